@@ -6,113 +6,673 @@ from pymongo import MongoClient
 from bson.objectid import ObjectId 
 
 # add for better testing
-from pymongo.errors import PyMongoError
+from pymongo.errors import (
+    ConnectionFailure,
+    PyMongoError,
+    ServerSelectionTimeoutError,
+    WaitQueueTimeoutError,
+)
 
+from pymongo.read_concern import ReadConcern
+from pymongo.read_preferences import (
+    Nearest,
+    Primary,
+    PrimaryPreferred,
+    Secondary,
+    SecondaryPreferred,
+)
+from pymongo.write_concern import WriteConcern
+
+import random
+import threading
+import time
 import urllib.parse
+from collections import OrderedDict
+
+from bson import json_util
+
+# Read preference mode names as used in MongoDB connection strings
+READ_PREFERENCES = {
+    'primary': Primary,
+    'primaryPreferred': PrimaryPreferred,
+    'secondary': Secondary,
+    'secondaryPreferred': SecondaryPreferred,
+    'nearest': Nearest,
+}
+
+
+class CRUDError(Exception):
+    """
+    A CRUD operation failed.
+
+    operation: name of the CRUD method ('create', 'read', ...)
+    cause: the underlying PyMongoError, or None
+    retryable: True if the failure was transient (network, election, pool)
+    attempts: number of attempts made
+    """
+
+    def __init__(self, operation, message, cause=None, retryable=False, attempts=0):
+        super().__init__(f"{operation} operation failed: {message}")
+        self.operation = operation
+        self.cause = cause
+        self.retryable = retryable
+        self.attempts = attempts
+
+
+class CircuitOpenError(CRUDError):
+    """The circuit breaker is open and MongoDB is not being called."""
+
+
+class CircuitBreaker:
+    """
+    Fail fast while MongoDB is unhealthy.
+
+    Opens after failure_threshold consecutive transient failures, rejects
+    calls for reset_timeout seconds, then lets a single trial call through
+    (half open) and closes again if it succeeds.
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=30):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        """'closed', 'open' or 'half_open'."""
+        with self._lock:
+            return self._state()
+
+    def _state(self):
+        if self.opened_at is None:
+            return 'closed'
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return 'half_open'
+        return 'open'
+
+    def allow(self):
+        """Return True if a call may go through to MongoDB."""
+        with self._lock:
+            state = self._state()
+            if state == 'closed':
+                return True
+            if state == 'half_open' and not self._trial_running:
+                self._trial_running = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._trial_running = False
+            if self.opened_at is not None or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+
+    def release(self):
+        """Free the half open trial slot after a call that says nothing about server health."""
+        with self._lock:
+            self._trial_running = False
+
+
+def _is_retryable(error, write):
+    """
+    Return True if an error is transient and the operation may be retried.
+
+    Reads retry on any connection level failure. Multi document writes only
+    retry when the request never reached a server or the server labelled
+    the error as a retryable write, so they are not applied twice.
+    Server selection timeouts are transient but _execute does not retry them.
+    """
+    if isinstance(error, (ServerSelectionTimeoutError, WaitQueueTimeoutError)):
+        return True
+    if hasattr(error, 'has_error_label') and error.has_error_label('RetryableWriteError'):
+        return True
+    return not write and isinstance(error, ConnectionFailure)
+
+
+def _read_preference(mode):
+    """Return a pymongo read preference for a mode name."""
+    if mode not in READ_PREFERENCES:
+        raise ValueError(f"Unknown read preference: {mode}")
+    return READ_PREFERENCES[mode]()
+
+
+def _write_concern(concern):
+    """Return a WriteConcern from a dict of options, a w value, or 'majority'."""
+    if isinstance(concern, WriteConcern):
+        return concern
+    if isinstance(concern, dict):
+        return WriteConcern(**concern)
+    return WriteConcern(w=concern)
 
 class CRUD: 
     """ 
     CRUD operations for Animal collection in MongoDB 
     """ 
 
-    def __init__(self, username, password, db_name='aac', host='localhost', port=27017, collection_name='animals'): 
+    def __init__(self, username, password, db_name='aac', host='localhost', port=27017, collection_name='animals',
+                 replica_set=None, read_preference=None, read_concern=None, write_concern=None,
+                 compressors=None, server_selection_timeout_ms=None, socket_timeout_ms=None,
+                 connect_timeout_ms=None, retries=3, backoff_base=0.1, backoff_max=2.0,
+                 breaker_threshold=5, breaker_reset=30, serve_stale=False, stale_entries=8): 
         """
         Initialize MongoDB connection.
 
         param username: MongoDB username
         param password: MongoDB password
         param db_name: Database name
-        param host: MongoDB host
-        param port: MongoDB port
+        param host: MongoDB host, a 'host:port' seed list, or a list of seeds
+        param port: MongoDB port, used for seeds without a port
         param collection_name: Collection name
+        param replica_set: Replica set name
+        param read_preference: Default read preference name, e.g. 'secondaryPreferred'
+        param read_concern: Default read concern level, e.g. 'majority'
+        param write_concern: Default write concern, a w value or dict of WriteConcern options
+        param compressors: Wire compressors in order of preference, e.g. ['zstd', 'snappy', 'zlib']
+        param server_selection_timeout_ms: Server selection timeout
+        param socket_timeout_ms: Socket read/write timeout
+        param connect_timeout_ms: Connection timeout
+        param retries: Retries for transient errors after the first attempt
+        param backoff_base: Base delay in seconds for jittered exponential backoff
+        param backoff_max: Maximum backoff delay in seconds
+        param breaker_threshold: Consecutive transient failures that open the circuit
+        param breaker_reset: Seconds the circuit stays open before a trial call
+        param serve_stale: Serve the last successful result of a read while MongoDB is failing
+        param stale_entries: Number of read results kept for serve_stale
         """
 
         # URL encode username/password for MongoDB URI
         username = urllib.parse.quote_plus(username)
         password = urllib.parse.quote_plus(password)
 
-         
+        # Seed list for replica sets, seeds without a port use the default port
+        seeds = host.split(',') if isinstance(host, str) else list(host)
+        hosts = ','.join(
+            seed.strip() if ':' in seed else f'{seed.strip()}:{port}'
+            for seed in seeds
+        )
+
+        self.uri = f'mongodb://{username}:{password}@{hosts}/{db_name}?authSource=admin'
+        self.db_name = db_name
+        self.collection_name = collection_name
+
+        # Client options, only the ones given override the driver defaults
+        options = {
+            'replicaSet': replica_set,
+            'readConcernLevel': read_concern,
+            'serverSelectionTimeoutMS': server_selection_timeout_ms,
+            'socketTimeoutMS': socket_timeout_ms,
+            'connectTimeoutMS': connect_timeout_ms,
+        }
+        if read_preference is not None:
+            options['read_preference'] = _read_preference(read_preference)
+        if compressors is not None:
+            options['compressors'] = compressors if isinstance(compressors, str) else ','.join(compressors)
+        if write_concern is not None:
+            document = _write_concern(write_concern).document
+            options.update({
+                'w': document.get('w'),
+                'wTimeoutMS': document.get('wtimeout'),
+                'journal': document.get('j'),
+            })
+
+        self.client_options = {key: value for key, value in options.items() if value is not None}
+
+        # Resilience settings
+        self.retries = retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.breaker = CircuitBreaker(breaker_threshold, breaker_reset)
+        self.serve_stale = serve_stale
+        self.stale_entries = stale_entries
+        self._stale = OrderedDict()
+        self._stale_lock = threading.Lock()
+
+        # Notified of documents written through this instance
+        self.observers = []
+
+        self._connect()
+
+    def _connect(self):
+        """
+        Open the MongoClient and bind the database and collection handles.
+        """
         # Initialize Connection via try excpetion
         try: 
-            self.client = MongoClient(
-                f'mongodb://{username}:{password}@{host}:{port}/{db_name}?authSource=admin'
-            )
+            self.client = MongoClient(self.uri, **self.client_options)
 
             # authentication check
             self.client.admin.command('ping')
 
-            self.database = self.client[db_name] 
-            self.collection = self.database[collection_name] 
+            self.database = self.client[self.db_name] 
+            self.collection = self.database[self.collection_name] 
 
-            print(f"Connected to MongoDB database '{db_name}', collection '{collection_name}'")
+            print(f"Connected to MongoDB database '{self.db_name}', collection '{self.collection_name}'")
 
         except PyMongoError as e:
             raise Exception(f"Error connecting to MongoDB: {e}")
 
-    def create(self, data):
+    def reconnect(self):
+        """
+        Replace the MongoClient with a fresh one.
+
+        MongoClient is not fork-safe, so a pre-forking server must call
+        this in every worker after fork. The inherited client belongs to
+        the parent process and is left untouched.
+        """
+        self._connect()
+
+    def _collection_for(self, read_preference=None, read_concern=None, write_concern=None):
+        """
+        Return the collection with per operation options applied.
+
+        param read_preference: Read preference name for this operation
+        param read_concern: Read concern level for this operation
+        param write_concern: Write concern for this operation
+        return: Collection, the default one when no options are given
+        """
+        options = {}
+        if read_preference is not None:
+            options['read_preference'] = _read_preference(read_preference)
+        if read_concern is not None:
+            options['read_concern'] = ReadConcern(read_concern)
+        if write_concern is not None:
+            options['write_concern'] = _write_concern(write_concern)
+
+        if not options:
+            return self.collection
+        return self.collection.with_options(**options)
+
+    def _backoff(self, attempt):
+        """Full jitter exponential backoff delay for an attempt number."""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    def _execute(self, operation, func, write=False):
+        """
+        Run a MongoDB call with bounded retries and the circuit breaker.
+
+        param operation: CRUD method name used in errors
+        param func: callable making the MongoDB call
+        param write: True for writes, which retry more conservatively
+        return: the result of func
+        raise: CircuitOpenError when failing fast, CRUDError on failure
+        """
+        if not self.breaker.allow():
+            raise CircuitOpenError(operation, "MongoDB circuit breaker is open", retryable=True)
+
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                result = func()
+            except PyMongoError as error:
+                retryable = _is_retryable(error, write)
+
+                # Only transient failures say anything about server health,
+                # each failed attempt counts towards opening the circuit
+                if retryable:
+                    self.breaker.record_failure()
+                else:
+                    self.breaker.record_success()
+
+                # A server selection timeout already waited the whole
+                # serverSelectionTimeoutMS, retrying would multiply it
+                retry = (
+                    retryable
+                    and attempt <= self.retries
+                    and not isinstance(error, ServerSelectionTimeoutError)
+                    and self.breaker.allow()
+                )
+                if retry:
+                    time.sleep(self._backoff(attempt - 1))
+                    continue
+
+                raise CRUDError(operation, str(error), cause=error, retryable=retryable, attempts=attempt) from error
+            except Exception:
+                # Errors raised before reaching the server, e.g. InvalidDocument,
+                # must not leave a half open circuit waiting on its trial forever
+                self.breaker.release()
+                raise
+
+            self.breaker.record_success()
+            return result
+
+    def add_observer(self, observer):
+        """
+        Register an observer of writes made through this CRUD instance.
+
+        After each successful write observer.documents_changed(removed, added)
+        is called with the documents as they were before and after it.
+        Observer errors are printed, not raised, as the write already succeeded.
+
+        Updated and deleted documents are read in full, unless every observer
+        has an observed_fields attribute listing the fields it needs.
+
+        param observer: object with a documents_changed(removed, added) method
+        """
+        self.observers.append(observer)
+
+    def _observed_projection(self):
+        """Projection of the fields observers need, None for whole documents."""
+        fields = set()
+        for observer in self.observers:
+            observed = getattr(observer, 'observed_fields', None)
+            if observed is None:
+                return None
+            fields.update(observed)
+        return {field: 1 for field in sorted(fields)} or {'_id': 1}
+
+    def _notify(self, removed, added):
+        # The write is done, raising here would make a caller retry it
+        for observer in self.observers:
+            try:
+                observer.documents_changed(removed, added)
+            except Exception as error:
+                print(f"Observer {type(observer).__name__} failed after write: {error}")
+
+    def _snapshot(self, query):
+        """Read the documents a write is about to change, for observers."""
+        if not self.observers:
+            return []
+        projection = self._observed_projection()
+        return self._execute('read', lambda: list(self.collection.find(query, projection)))
+
+    def create(self, data, write_concern=None):
         """
         Insert a document into the collection.
 
         param data: dict of key/value pair
-        return: True if insert was successful, False otherwise
+        param write_concern: optional write concern for this insert
+        return: True if insert was successful
+        raise: CRUDError if the insert failed
         """
         if not isinstance(data, dict) or not data: 
             raise ValueError("Data must be a non empty dictionary")
 
-        try:
-            self.collection.insert_one(data)
-            return True
-        except PyMongoError as e:
-            print(f"Insert has failed: {e}")
-            return False
+        collection = self._collection_for(write_concern=write_concern)
+        self._execute('create', lambda: collection.insert_one(data), write=True)
+        self._notify([], [data])
+        return True
 
-    def read(self, query):
+    def read(self, query, read_preference=None, read_concern=None, projection=None):
         """
         Query documents from the collection
 
         param query: query a dict of key/value pairs to match documents
-        return: list of documents matching the query
+        param read_preference: optional read preference name for this query
+        param read_concern: optional read concern level for this query
+        param projection: optional projection dict
+        return: list of documents matching the query, possibly a stale
+                earlier result when serve_stale is set and MongoDB is failing
+        raise: CRUDError if the query failed and no stale result is available
         """
         if not isinstance(query, dict):
             raise ValueError("Query must be a dict")
 
+        collection = self._collection_for(read_preference=read_preference, read_concern=read_concern)
+        key = json_util.dumps([query, projection], sort_keys=True)
+
         try:
-            cursor = self.collection.find(query)
-            return list(cursor)
-        except PyMongoError as e:
-            print(f"Read operation failed: {e}")
-            return []
+            documents = self._execute('read', lambda: list(collection.find(query, projection)))
+        except CRUDError as error:
+            if not (self.serve_stale and error.retryable):
+                raise
+            with self._stale_lock:
+                if key not in self._stale:
+                    raise
+                return list(self._stale[key])
+
+        if self.serve_stale:
+            with self._stale_lock:
+                self._stale[key] = documents
+                self._stale.move_to_end(key)
+                while len(self._stale) > self.stale_entries:
+                    self._stale.popitem(last=False)
+
+        return documents
+
+    def stream(self, query, projection=None, batch_size=1000, read_preference=None):
+        """
+        Iterate over matching documents without loading them all.
+
+        Documents are fetched from the cursor batch_size at a time, so
+        memory stays bounded however many documents match. The first batch
+        is fetched before returning, so the query is retried and counted by
+        the circuit breaker like any other read.
+
+        param query: query a dict of key/value pairs to match documents
+        param projection: optional projection dict
+        param batch_size: documents per cursor batch
+        param read_preference: optional read preference name for this query
+        return: iterator of documents in _id order
+        raise: CRUDError if the query failed
+        """
+        if not isinstance(query, dict):
+            raise ValueError("Query must be a dict")
+
+        collection = self._collection_for(read_preference=read_preference)
+
+        def first_batch():
+            cursor = collection.find(query, projection).sort('_id', 1).batch_size(batch_size)
+            documents = iter(cursor)
+            try:
+                return cursor, documents, next(documents, None)
+            except BaseException:
+                cursor.close()
+                raise
+
+        cursor, documents, first = self._execute('stream', first_batch)
+        return self._iterate(cursor, documents, first)
 
-    def update(self, query, new_values):
+    @staticmethod
+    def _iterate(cursor, documents, first):
+        """Yield the first document then the rest of an open cursor, closing it when done."""
+        try:
+            if first is None:
+                return
+            yield first
+            for document in documents:
+                yield document
+        except PyMongoError as error:
+            raise CRUDError('stream', str(error), cause=error, retryable=_is_retryable(error, False)) from error
+        finally:
+            cursor.close()
+
+    def create_text_index(self, fields=('name', 'breed', 'color')):
+        """
+        Create the text index used by search().
+
+        param fields: fields covered by the text index
+        return: name of the index
+        """
+        keys = [(field, 'text') for field in fields]
+        return self._execute('create_text_index', lambda: self.collection.create_index(keys, name='search_text'))
+
+    def search(self, text, limit=20, query=None):
+        """
+        Full text search ranked by MongoDB text score.
+
+        Needs the index from create_text_index(). Matches whole (stemmed)
+        words; see Search_Module for prefix and typo tolerant matching.
+
+        param text: search text
+        param limit: maximum number of documents returned
+        param query: optional extra filter, e.g. a rescue profile query
+        return: list of documents, best match first, with a 'score' field
+        raise: CRUDError if the search failed
+        """
+        if not isinstance(text, str):
+            raise ValueError("Search text must be a string")
+
+        search_query = {'$text': {'$search': text}}
+        if query:
+            search_query = {'$and': [query, search_query]}
+        score = {'score': {'$meta': 'textScore'}}
+
+        return self._execute('search', lambda: list(
+            self.collection.find(search_query, score).sort([('score', {'$meta': 'textScore'})]).limit(limit)
+        ))
+
+    def update(self, query, new_values, write_concern=None):
         """
         Update documents in the collection.
 
         param query: Dictornary to match documents
         param new_values: Dictornary of update values
+        param write_concern: optional write concern for this update
         return: Number of ducoments modified
+        raise: CRUDError if the update failed
         """
         if not isinstance(query, dict) or not isinstance(new_values, dict):
             raise ValueError("Query and new_values must be dictionaries")
-        try:
-            result = self.collection.update_many(query, new_values)
-            return result.modified_count
-        except PyMongoError as error:
-            print(f"Update operation failed: {error}")
-            return 0
+        collection = self._collection_for(write_concern=write_concern)
+        before = self._snapshot(query)
+        result = self._execute('update', lambda: collection.update_many(query, new_values), write=True)
+
+        if self.observers:
+            after = self._snapshot({'_id': {'$in': [document['_id'] for document in before]}})
+            self._notify(before, after)
 
-    def delete(self, query):
+        return result.modified_count
+
+    def delete(self, query, write_concern=None):
         """
         Delete document from the collection.
 
         param query: dictionary to match documents
+        param write_concern: optional write concern for this delete
         retrun: Number of documents deleted
+        raise: CRUDError if the delete failed
         """
         if not isinstance(query, dict):
             raise ValueError("Query must be a dictionary")
 
-        try:
-            result = self.collection.delete_many(query)
-            return result.deleted_count
-        except PyMongoError as error:
-            print(f"Delete operation failed: {error}")
-            return 0
+        collection = self._collection_for(write_concern=write_concern)
+        before = self._snapshot(query)
+        result = self._execute('delete', lambda: collection.delete_many(query), write=True)
+        self._notify(before, [])
+        return result.deleted_count
+
+    def update_batched(self, query, new_values, batch_size=1000, max_rate=None, progress=None,
+                       resume_after=None, dry_run=False, write_concern=None):
+        """
+        Update documents in _id order, one batch at a time.
+
+        Keeps each write short so dashboard readers are not starved while a
+        large collection is rewritten.
+
+        param query: Dictornary to match documents
+        param new_values: Dictornary of update values
+        param batch_size: documents per batch
+        param max_rate: optional maximum documents per second
+        param progress: optional callable given the progress dict after each batch
+        param resume_after: _id checkpoint from a previous run, 'last_id' in progress
+        param dry_run: only count the matching documents and explain the query
+        param write_concern: optional write concern for each batch
+        return: progress dict with processed, modified, batches and last_id,
+                or the dry run dict with matched and plan
+        raise: CRUDError if a batch failed, progress has the last checkpoint
+        """
+        if not isinstance(query, dict) or not isinstance(new_values, dict):
+            raise ValueError("Query and new_values must be dictionaries")
+
+        collection = self._collection_for(write_concern=write_concern)
+
+        def apply(batch_query):
+            return collection.update_many(batch_query, new_values).modified_count
+
+        return self._batched('update', query, apply, 'modified', batch_size, max_rate,
+                             progress, resume_after, dry_run)
+
+    def delete_batched(self, query, batch_size=1000, max_rate=None, progress=None,
+                       resume_after=None, dry_run=False, write_concern=None):
+        """
+        Delete documents in _id order, one batch at a time.
+
+        param query: dictionary to match documents
+        param batch_size: documents per batch
+        param max_rate: optional maximum documents per second
+        param progress: optional callable given the progress dict after each batch
+        param resume_after: _id checkpoint from a previous run, 'last_id' in progress
+        param dry_run: only count the matching documents and explain the query
+        param write_concern: optional write concern for each batch
+        return: progress dict with processed, deleted, batches and last_id,
+                or the dry run dict with matched and plan
+        raise: CRUDError if a batch failed, progress has the last checkpoint
+        """
+        if not isinstance(query, dict):
+            raise ValueError("Query must be a dictionary")
+
+        collection = self._collection_for(write_concern=write_concern)
+
+        def apply(batch_query):
+            return collection.delete_many(batch_query).deleted_count
+
+        return self._batched('delete', query, apply, 'deleted', batch_size, max_rate,
+                             progress, resume_after, dry_run)
+
+    def _batched(self, operation, query, apply, count_name, batch_size, max_rate,
+                 progress, resume_after, dry_run):
+        """
+        Walk the documents matching query in _id ranges and apply a write to each.
+
+        Each batch write is restricted to the batch _ids and the original
+        query, so documents changed since they were listed are left alone.
+        """
+        if batch_size < 1:
+            raise ValueError("batch_size must be at least 1")
+
+        def in_range(last_id):
+            if last_id is None:
+                return query
+            return {'$and': [query, {'_id': {'$gt': last_id}}]}
+
+        if dry_run:
+            remaining = in_range(resume_after)
+            matched = self._execute('count', lambda: self.collection.count_documents(remaining))
+            plan = self._execute('explain', lambda: self.collection.find(remaining).explain())
+            return {'matched': matched, 'plan': plan.get('queryPlanner', plan)}
+
+        # Observers need their fields, otherwise only _ids are read
+        projection = self._observed_projection() if self.observers else {'_id': 1}
+
+        state = {'processed': 0, count_name: 0, 'batches': 0, 'last_id': resume_after}
+        started = time.monotonic()
+
+        while True:
+            batch_query = in_range(state['last_id'])
+            batch = self._execute('read', lambda: list(
+                self.collection.find(batch_query, projection).sort('_id', 1).limit(batch_size)
+            ))
+            if not batch:
+                return state
+
+            ids = [document['_id'] for document in batch]
+            target = {'$and': [query, {'_id': {'$in': ids}}]}
+            state[count_name] += self._execute(operation, lambda: apply(target), write=True)
+
+            if self.observers:
+                after = [] if operation == 'delete' else self._snapshot({'_id': {'$in': ids}})
+                self._notify(batch, after)
+
+            state['processed'] += len(batch)
+            state['batches'] += 1
+            state['last_id'] = ids[-1]
+
+            if progress is not None:
+                progress(dict(state))
+
+            # Throttle to max_rate documents per second
+            if max_rate:
+                ahead = state['processed'] / max_rate - (time.monotonic() - started)
+                if ahead > 0:
+                    time.sleep(ahead)
@@ -0,0 +1,335 @@
+"""
+Change Watcher Module for the Animal collection
+
+Follows inserts, updates and deletes on a MongoDB collection in a
+background thread so dashboards can apply them incrementally instead
+of re-querying. Uses change streams on replica sets and falls back to
+polling the 'datetime' field on standalone servers.
+
+Positions are taken from the server (change stream cluster time, or
+the polled 'datetime' value and _id), so every worker process reports
+the same position for the same change and clients can move between
+workers. Polling needs an index on 'datetime', the watcher creates it
+when the user is allowed to.
+"""
+
+import os
+import threading
+from collections import deque
+
+from pymongo.errors import OperationFailure, PyMongoError
+
+# Server error code for $changeStream on a standalone mongod
+CHANGE_STREAM_UNSUPPORTED = 40573
+
+
+def timestamp_position(timestamp):
+    """
+    Convert a BSON Timestamp into a sortable position string.
+
+    param timestamp: bson.timestamp.Timestamp (cluster time)
+    return: zero padded 'time:inc' string
+    """
+    return f"{timestamp.time:010d}:{timestamp.inc:010d}"
+
+
+def matches_query(document, query):
+    """
+    Evaluate a MongoDB filter against a single document in Python.
+
+    Supports top level equality and the $in, $nin, $ne, $gt, $gte,
+    $lt and $lte operators used by the dashboard queries.
+
+    param document: dict document
+    param query: dict MongoDB filter
+    return: True if the document matches the filter
+    """
+    for field, condition in query.items():
+        value = document.get(field)
+
+        if not isinstance(condition, dict):
+            if value != condition:
+                return False
+            continue
+
+        for operator, operand in condition.items():
+            if operator == '$in':
+                matched = value in operand
+            elif operator == '$nin':
+                matched = value not in operand
+            elif operator == '$ne':
+                matched = value != operand
+            elif operator in ('$gt', '$gte', '$lt', '$lte'):
+                if value is None:
+                    return False
+                try:
+                    matched = {
+                        '$gt': value > operand,
+                        '$gte': value >= operand,
+                        '$lt': value < operand,
+                        '$lte': value <= operand,
+                    }[operator]
+                except TypeError:
+                    return False
+            else:
+                raise ValueError(f"Unsupported query operator: {operator}")
+
+            if not matched:
+                return False
+
+    return True
+
+
+class ChangeWatcher:
+    """
+    Background watcher that records collection changes as events.
+
+    Each event is a dict with 'op' ('insert', 'update' or 'delete'),
+    'id' (ObjectId as hex string), 'position' and 'document' (None
+    for deletes).
+    """
+
+    def __init__(self, crud, poll_interval=5, time_field='datetime', max_events=1000):
+        """
+        Initialize the watcher without starting it.
+
+        param crud: CRUD instance, its collection is read when the thread starts
+        param poll_interval: seconds between polls / reconnect attempts
+        param time_field: field compared when polling a standalone server
+        param max_events: number of events retained for clients
+        """
+        self.crud = crud
+        self.poll_interval = poll_interval
+        self.time_field = time_field
+        self.events = deque(maxlen=max_events)
+        self.observers = []
+
+        # Position before which events may be missing
+        self.horizon = None
+        self.mode = None
+
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._pid = None
+
+    def start(self):
+        """
+        Start the watcher thread once per process.
+
+        Threads do not survive fork, so calling this from a forked worker
+        starts a new thread for that worker.
+        """
+        with self._lock:
+            if self._pid == os.getpid() and self._thread is not None and self._thread.is_alive():
+                return
+
+            self._pid = os.getpid()
+            self._stop.clear()
+            self._thread = threading.Thread(
+                target=self._run, name='change-watcher', daemon=True
+            )
+            self._thread.start()
+
+    def stop(self):
+        """Ask the watcher thread to exit."""
+        self._stop.set()
+
+    def changes_since(self, position):
+        """
+        Return changes recorded after a position.
+
+        param position: position previously returned, or None for a new client
+        return: (latest position, list of events), events is None when the
+                position is older than the retained history and the caller
+                must reload in full
+        """
+        with self._lock:
+            if self.horizon is None:
+                return position, []
+
+            latest = self.events[-1]['position'] if self.events else self.horizon
+            if position is None:
+                return latest, []
+            if position < self.horizon:
+                return latest, None
+
+            events = [event for event in self.events if event['position'] > position]
+            return max(latest, position), events
+
+    def add_observer(self, observer):
+        """
+        Register an observer of changes seen by the watcher.
+
+        observer.documents_changed(removed, added) is called from the
+        watcher thread; removed documents only carry their '_id'.
+
+        param observer: object with a documents_changed(removed, added) method
+        """
+        self.observers.append(observer)
+
+    def record(self, op, object_id, position, document=None):
+        """
+        Append an event, moving the horizon when old events are dropped.
+        """
+        # Raising here would end the watcher thread
+        for observer in self.observers:
+            try:
+                observer.documents_changed([{'_id': object_id}], [] if document is None else [document])
+            except Exception as error:
+                print(f"Observer {type(observer).__name__} failed after change: {error}")
+
+        with self._lock:
+            if len(self.events) == self.events.maxlen:
+                self.horizon = self.events[0]['position']
+
+            self.events.append({
+                'op': op,
+                'id': str(object_id),
+                'position': position,
+                'document': document,
+            })
+
+    def _run(self):
+        """
+        Thread body, prefers change streams and falls back to polling.
+
+        Only a server without change streams is polled. Other failures,
+        e.g. lost resume history or a missing changeStream privilege,
+        restart the stream after poll_interval, so positions never mix
+        cluster times with polled values.
+        """
+        while not self._stop.is_set():
+            try:
+                self._watch_change_stream()
+                return
+            except OperationFailure as e:
+                if e.code == CHANGE_STREAM_UNSUPPORTED:
+                    self._poll()
+                    return
+                print(f"Change stream failed: {e}")
+                self._stop.wait(self.poll_interval)
+
+    def _watch_change_stream(self):
+        """Follow the collection change stream, resuming after errors."""
+        collection = self.crud.collection
+
+        start_time = collection.database.command('ping').get('operationTime')
+        if start_time is None:
+            # Standalone servers do not report cluster time
+            raise OperationFailure(
+                "Change streams require a replica set", CHANGE_STREAM_UNSUPPORTED
+            )
+
+        with self._lock:
+            self.mode = 'change_stream'
+            # After a restart changes before start_time may be missing,
+            # clients older than it reload
+            self.events.clear()
+            self.horizon = timestamp_position(start_time)
+
+        resume_token = None
+        while not self._stop.is_set():
+            try:
+                options = {'full_document': 'updateLookup'}
+                if resume_token is None:
+                    options['start_at_operation_time'] = start_time
+                else:
+                    options['resume_after'] = resume_token
+
+                with collection.watch(**options) as stream:
+                    while not self._stop.is_set():
+                        change = stream.try_next()
+                        if change is None:
+                            self._stop.wait(0.5)
+                            continue
+                        resume_token = stream.resume_token
+                        self._record_change(change)
+
+            except OperationFailure:
+                raise
+            except PyMongoError as e:
+                print(f"Change stream interrupted: {e}")
+                self._stop.wait(self.poll_interval)
+
+    def _record_change(self, change):
+        """Translate a change stream document into an event."""
+        op = change['operationType']
+        position = timestamp_position(change['clusterTime'])
+        object_id = change['documentKey']['_id']
+
+        if op in ('insert', 'update', 'replace'):
+            document = change.get('fullDocument')
+            if document is None:
+                # Deleted again before the update could be looked up
+                self.record('delete', object_id, position)
+            else:
+                self.record('insert' if op == 'insert' else 'update', object_id, position, document)
+        elif op == 'delete':
+            self.record('delete', object_id, position)
+
+    def _poll(self):
+        """
+        Poll for documents at or after the last seen time field value.
+
+        Time field values are not unique (AAC datetimes are to the minute),
+        so documents already seen at the last value are skipped by _id and
+        positions are 'value|_id'. Polling only sees inserts (and updates
+        that advance the time field); deletes are not visible without a
+        change stream.
+        """
+        collection = self.crud.collection
+        last_value, seen_ids = None, set()
+
+        # Every worker runs the polling query every poll_interval seconds
+        try:
+            collection.create_index(self.time_field)
+        except PyMongoError as e:
+            print(f"Change polling needs an index on '{self.time_field}': {e}")
+
+        while not self._stop.is_set():
+            try:
+                if last_value is None:
+                    newest = list(
+                        collection.find({}, {self.time_field: 1})
+                        .sort(self.time_field, -1).limit(1)
+                    )
+                    value = newest[0].get(self.time_field, '') if newest else ''
+                    # Documents already at the newest value are not changes
+                    seen_ids = {document['_id'] for document in collection.find({self.time_field: value}, {'_id': 1})}
+                    last_value = value
+                    with self._lock:
+                        self.mode = 'poll'
+                        if self.horizon is None:
+                            self.horizon = str(last_value)
+                else:
+                    last_value, seen_ids = self._poll_changes(collection, last_value, seen_ids)
+
+            except PyMongoError as e:
+                print(f"Change polling failed: {e}")
+
+            self._stop.wait(self.poll_interval)
+
+    def _poll_changes(self, collection, last_value, seen_ids):
+        """
+        Record documents at or after last_value that were not seen yet.
+
+        param collection: pymongo collection
+        param last_value: last time field value seen
+        param seen_ids: _ids of the documents seen at last_value
+        return: (last_value, seen_ids) after this poll
+        """
+        cursor = collection.find(
+            {self.time_field: {"$gte": last_value}}
+        ).sort([(self.time_field, 1), ('_id', 1)])
+
+        for document in cursor:
+            value = document.get(self.time_field)
+            if value == last_value and document['_id'] in seen_ids:
+                continue
+            if value != last_value:
+                last_value, seen_ids = value, set()
+            seen_ids.add(document['_id'])
+            self.record('insert', document['_id'], f"{value}|{document['_id']}", document)
+
+        return last_value, seen_ids
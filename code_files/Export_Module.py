@@ -0,0 +1,452 @@
+"""
+Export Module for Grazioso Salvare rescue candidates
+
+Streams the animals matching a rescue profile straight from the MongoDB
+cursor to CSV, JSONL or Parquet. Rows are written in chunks, so memory
+stays bounded and no DataFrame of the whole result is built.
+
+- export_stream(): chunks for a chunked HTTP response
+- register_export_routes(): /export/<profile>.<format> on the Flask server
+- export_profiles(): several profiles (optionally partitioned by a field)
+  exported to files in parallel by a process pool, also used by the CLI
+
+Usage:
+    AAC_PASS=... python Export_Module.py water mountain disaster --format csv
+    AAC_PASS=... python Export_Module.py water --format parquet --partition-by breed
+"""
+
+import argparse
+import csv
+import io
+import json
+import os
+import re
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from bson import json_util
+
+from CRUD_Python_Module import CRUD, CRUDError
+from Rescue_Query_Module import RESCUE_PROFILES, build_rescue_query
+
+EXPORT_FORMATS = {
+    'csv': 'text/csv',
+    'jsonl': 'application/x-ndjson',
+    'parquet': 'application/vnd.apache.parquet',
+}
+
+# Rows written per chunk (and per Parquet row group)
+CHUNK_ROWS = 1000
+
+# Concurrent HTTP exports per dashboard worker process
+MAX_HTTP_EXPORTS = 1
+
+# Column types of the animal fields, always exported so the CSV header
+# and Parquet schema do not depend on the first document
+EXPORT_TYPES = {
+    'age_upon_outcome': 'string',
+    'animal_id': 'string',
+    'animal_type': 'string',
+    'breed': 'string',
+    'color': 'string',
+    'date_of_birth': 'string',
+    'datetime': 'string',
+    'monthyear': 'string',
+    'name': 'string',
+    'outcome_subtype': 'string',
+    'outcome_type': 'string',
+    'sex_upon_outcome': 'string',
+    'location_lat': 'float64',
+    'location_long': 'float64',
+    'age_upon_outcome_in_weeks': 'float64',
+}
+
+
+def _json_default(value):
+    # ObjectId, datetime and other BSON types
+    return json_util.default(value)
+
+
+def _chunks(documents, chunk_rows):
+    """Group an iterable of documents into lists of chunk_rows."""
+    chunk = []
+    for document in documents:
+        chunk.append(document)
+        if len(chunk) == chunk_rows:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _export_types(chunk):
+    """EXPORT_TYPES plus a string column for every other field of the first chunk."""
+    kinds = dict(EXPORT_TYPES)
+    for document in chunk:
+        for field in document:
+            kinds.setdefault(field, 'string')
+    return kinds
+
+
+def stream_csv(documents, chunk_rows=CHUNK_ROWS):
+    """
+    Yield CSV text chunks.
+
+    The header is the columns of _export_types(), as in Parquet; fields
+    that only appear after the first chunk are ignored, missing fields
+    are left empty.
+    """
+    buffer = io.StringIO()
+    writer = None
+
+    for chunk in _chunks(documents, chunk_rows):
+        if writer is None:
+            writer = csv.DictWriter(buffer, fieldnames=list(_export_types(chunk)), extrasaction='ignore')
+            writer.writeheader()
+        writer.writerows(chunk)
+
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
+
+def stream_jsonl(documents, chunk_rows=CHUNK_ROWS):
+    """Yield JSON Lines text chunks, one document per line."""
+    for chunk in _chunks(documents, chunk_rows):
+        yield ''.join(json.dumps(document, default=_json_default) + '\n' for document in chunk)
+
+
+class _ChunkSink(io.RawIOBase):
+    """
+    Write-only file that hands out what was written since the last take().
+
+    tell() keeps counting across takes, so the Parquet footer offsets
+    stay correct while earlier bytes are already sent.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.parts = []
+        self.position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.parts.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def take(self):
+        data = b''.join(self.parts)
+        self.parts = []
+        return data
+
+
+def _require_pyarrow():
+    """Return the pyarrow and pyarrow.parquet modules, ValueError if missing."""
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ValueError("Parquet export needs the pyarrow package")
+    return pa, pq
+
+
+def _parquet_value(value, kind):
+    """Convert a value to a Parquet column type, None if it is not convertible."""
+    if value is None:
+        return None
+    if kind == 'string':
+        return value if isinstance(value, str) else str(value)
+    if isinstance(value, bool):
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def stream_parquet(documents, chunk_rows=CHUNK_ROWS):
+    """
+    Yield Parquet bytes, one row group per chunk.
+
+    The schema is _export_types() of the first chunk. Values are
+    converted to their column type (None if not convertible), so a null,
+    missing or differently typed value later on cannot break the file;
+    fields that only appear later are ignored, as in CSV. Needs pyarrow.
+    """
+    pa, pq = _require_pyarrow()
+
+    sink = _ChunkSink()
+    writer = None
+    kinds = None
+
+    for chunk in _chunks(documents, chunk_rows):
+        if writer is None:
+            kinds = _export_types(chunk)
+            schema = pa.schema([(field, pa.type_for_alias(kind)) for field, kind in kinds.items()])
+            writer = pq.ParquetWriter(sink, schema)
+
+        columns = [
+            pa.array([_parquet_value(document.get(field), kind) for document in chunk],
+                     type=writer.schema.field(field).type)
+            for field, kind in kinds.items()
+        ]
+        writer.write_table(pa.Table.from_arrays(columns, schema=writer.schema))
+        yield sink.take()
+
+    if writer is not None:
+        # Parquet footer
+        writer.close()
+        yield sink.take()
+
+
+STREAM_WRITERS = {
+    'csv': stream_csv,
+    'jsonl': stream_jsonl,
+    'parquet': stream_parquet,
+}
+
+
+def export_stream(crud, query, export_format, chunk_rows=CHUNK_ROWS):
+    """
+    Stream the documents matching a query in an export format.
+
+    param crud: CRUD instance
+    param query: MongoDB query, e.g. from build_rescue_query
+    param export_format: 'csv', 'jsonl' or 'parquet'
+    param chunk_rows: rows per yielded chunk
+    return: generator of str (csv, jsonl) or bytes (parquet) chunks
+    raise: ValueError for an unknown format, or Parquet without pyarrow,
+        CRUDError if the query failed
+    """
+    if export_format not in STREAM_WRITERS:
+        raise ValueError(f"Unknown export format: {export_format}")
+    if export_format == 'parquet':
+        # Before the response starts, not on the first chunk
+        _require_pyarrow()
+
+    documents = crud.stream(query, projection={'_id': 0}, batch_size=chunk_rows,
+                            read_preference='secondaryPreferred')
+    return STREAM_WRITERS[export_format](documents, chunk_rows)
+
+
+def register_export_routes(server, crud, max_exports=MAX_HTTP_EXPORTS):
+    """
+    Add GET /export/<profile>.<format> to a Flask server.
+
+    The response is streamed with chunked transfer encoding. Each worker
+    process runs at most max_exports exports at once and answers 429
+    beyond that, so exports never take every dashboard thread. The query
+    runs before the response starts, a failed one answers 503.
+
+    param server: Flask server, e.g. app.server
+    param crud: CRUD instance used for the export queries
+    param max_exports: concurrent exports per process
+    """
+    from flask import Response, abort, stream_with_context
+
+    slots = threading.BoundedSemaphore(max_exports)
+
+    @server.route('/export/<profile>.<export_format>')
+    def export_profile(profile, export_format):
+        if profile not in RESCUE_PROFILES + ('reset',) or export_format not in EXPORT_FORMATS:
+            abort(404)
+        if not slots.acquire(blocking=False):
+            abort(429)
+
+        try:
+            chunks = export_stream(crud, build_rescue_query(profile), export_format)
+        except ValueError:
+            slots.release()
+            abort(501)
+        except CRUDError as error:
+            slots.release()
+            print(f"Export {profile}.{export_format} failed: {error}")
+            abort(503)
+
+        response = Response(
+            stream_with_context(chunks),
+            mimetype=EXPORT_FORMATS[export_format],
+            headers={'Content-Disposition': f'attachment; filename={profile}.{export_format}'},
+        )
+        # Runs when the stream ends or the client disconnects
+        response.call_on_close(slots.release)
+        return response
+
+    return export_profile
+
+
+# Parallel file exports
+
+# CRUD instance of each pool process, opened by _init_worker
+_worker_crud = None
+
+
+def _init_worker(connection):
+    """Pool initializer, every process opens its own MongoClient."""
+    global _worker_crud
+    _worker_crud = CRUD(**connection)
+
+
+def _export_file(task):
+    """Pool task: export one query to one file, return (path, rows)."""
+    query, export_format, path = task
+    rows = 0
+
+    def counted(documents):
+        nonlocal rows
+        for document in documents:
+            rows += 1
+            yield document
+
+    documents = counted(_worker_crud.stream(query, projection={'_id': 0}, batch_size=CHUNK_ROWS,
+                                            read_preference='secondaryPreferred'))
+    mode = 'wb' if export_format == 'parquet' else 'w'
+    encoding = None if export_format == 'parquet' else 'utf-8'
+    with open(path, mode, encoding=encoding, newline='' if encoding else None) as output:
+        for chunk in STREAM_WRITERS[export_format](documents):
+            output.write(chunk)
+
+    return path, rows
+
+
+def _file_part(value):
+    if value is None:
+        return 'missing'
+    return re.sub(r'[^A-Za-z0-9._-]+', '_', str(value)).strip('_') or 'none'
+
+
+def export_tasks(profiles, export_format, output_dir, partition_values=None):
+    """
+    Build (query, format, path) tasks, one per profile or per partition.
+
+    param profiles: rescue profile names
+    param export_format: 'csv', 'jsonl' or 'parquet'
+    param output_dir: directory for the files
+    param partition_values: optional {profile: (field, values)} splitting
+                            a profile into one file per field value, None
+                            for the documents where the field is null or missing
+    return: list of tasks for _export_file
+    """
+    tasks = []
+    # Lower case, values such as 'Lab/Mix' and 'Lab Mix' must not share
+    # a file, on case insensitive file systems either
+    used = set()
+    for profile in profiles:
+        query = build_rescue_query(profile)
+        field, values = (partition_values or {}).get(profile, (None, None))
+
+        if field is None:
+            tasks.append((query, export_format, os.path.join(output_dir, f'{profile}.{export_format}')))
+            continue
+
+        for value in values:
+            part_query = {'$and': [query, {field: value}]}
+            name, count = f'{profile}-{_file_part(value)}', 1
+            while f'{name}.{export_format}'.lower() in used:
+                count += 1
+                name = f'{profile}-{_file_part(value)}-{count}'
+            used.add(f'{name}.{export_format}'.lower())
+            tasks.append((part_query, export_format, os.path.join(output_dir, f'{name}.{export_format}')))
+
+    return tasks
+
+
+def _partition_values(crud, query, field):
+    """
+    Distinct values of a field among the documents matching a query.
+
+    distinct() leaves out documents without the field, so None is added
+    when any matching document has it null or missing.
+    """
+    values = sorted((value for value in crud.collection.distinct(field, query) if value is not None), key=str)
+    if crud.collection.count_documents({'$and': [query, {field: None}]}, limit=1):
+        values.append(None)
+    return values
+
+
+def export_profiles(connection, profiles, export_format='csv', output_dir='.', partition_by=None,
+                    processes=None):
+    """
+    Export rescue profiles to files in parallel.
+
+    param connection: CRUD keyword arguments (username, password, host, ...)
+    param profiles: rescue profile names
+    param export_format: 'csv', 'jsonl' or 'parquet'
+    param output_dir: directory for the files, created if missing
+    param partition_by: optional field, each profile is split into one file per
+                        value, plus a '-missing' file for null or missing values
+    param processes: pool size, defaults to one per task up to the CPU count
+    return: list of (path, rows)
+    """
+    if export_format not in STREAM_WRITERS:
+        raise ValueError(f"Unknown export format: {export_format}")
+    if export_format == 'parquet':
+        _require_pyarrow()
+    for profile in profiles:
+        if profile not in RESCUE_PROFILES + ('reset',):
+            raise ValueError(f"Unknown rescue profile: {profile}")
+
+    os.makedirs(output_dir, exist_ok=True)
+
+    partition_values = None
+    if partition_by:
+        crud = CRUD(**connection)
+        try:
+            partition_values = {
+                profile: (partition_by, _partition_values(crud, build_rescue_query(profile), partition_by))
+                for profile in profiles
+            }
+        finally:
+            crud.client.close()
+
+    tasks = export_tasks(profiles, export_format, output_dir, partition_values)
+    if not tasks:
+        return []
+
+    workers = processes or min(len(tasks), os.cpu_count() or 1)
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(connection,)) as pool:
+        return list(pool.map(_export_file, tasks))
+
+
+def main(argv=None):
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description="Export Grazioso Salvare rescue candidates.")
+    parser.add_argument('profiles', nargs='+', choices=RESCUE_PROFILES + ('reset',))
+    parser.add_argument('--format', dest='export_format', choices=sorted(EXPORT_FORMATS), default='csv')
+    parser.add_argument('--output-dir', default='exports')
+    parser.add_argument('--partition-by', help="field to split each profile into one file per value")
+    parser.add_argument('--processes', type=int)
+    args = parser.parse_args(argv)
+
+    password = os.getenv("AAC_PASS")
+    if not password:
+        parser.error("MongoDB credentials not set. Please set AAC_PASS environment variable.")
+
+    connection = {
+        'username': os.getenv("AAC_USER", "aacuser"),
+        'password': password,
+        'db_name': 'aac',
+        'collection_name': 'animals',
+        'host': os.getenv("AAC_HOSTS", "localhost"),
+        'replica_set': os.getenv("AAC_REPLICA_SET"),
+    }
+
+    try:
+        results = export_profiles(connection, args.profiles, args.export_format, args.output_dir,
+                                  args.partition_by, args.processes)
+    except CRUDError as error:
+        parser.exit(1, f"{error}\n")
+
+    for path, rows in results:
+        print(f"{path}: {rows} rows")
+
+
+if __name__ == '__main__':
+    main()
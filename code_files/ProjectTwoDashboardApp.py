@@ -11,14 +11,28 @@ Date: 2/22/2026
 Maintainer: Kyle Gortych
 """
 
-from dash import Dash, dash_table, html, dcc
-from dash.dependencies import Input, Output
+from dash import Dash, dash_table, html, dcc, no_update
+from dash.dependencies import Input, Output, State
 import pandas as pd
 import os
 import base64
 import plotly.express as px
-
-from CRUD_Python_Module import CRUD
+import plotly.io as pio
+
+from CRUD_Python_Module import CRUD, CRUDError
+from Change_Watcher_Module import ChangeWatcher, matches_query
+from Record_Store_Module import RecordStore
+from Export_Module import EXPORT_FORMATS, register_export_routes
+from Rescue_Query_Module import build_rescue_query
+from Search_Module import SearchIndex
+
+# Dash serializes callback responses through plotly's JSON encoder,
+# use the orjson engine (native NumPy and datetime support) when available
+try:
+    import orjson  # noqa: F401
+    pio.json.config.default_engine = "orjson"
+except ImportError:
+    pass
 
 # Data Manipulation & Model
 
@@ -32,15 +46,79 @@ if not username or not password:
         "Please set AAC_PASS environment variable."
     )
 
-# Connect to database via CRUD Module
-shelter = CRUD(username, password, db_name='aac', collection_name='animals')
+# Connect to database via CRUD Module, dashboard reads are served by
+# secondaries when AAC_HOSTS/AAC_REPLICA_SET point at a replica set
+shelter = CRUD(
+    username,
+    password,
+    db_name='aac',
+    collection_name='animals',
+    host=os.getenv("AAC_HOSTS", "localhost"),
+    replica_set=os.getenv("AAC_REPLICA_SET"),
+    read_preference='secondaryPreferred',
+    compressors=os.getenv("AAC_COMPRESSORS"),
+    server_selection_timeout_ms=5000,
+    serve_stale=True,
+)
+
 
-# Retrieve ALL documents (unfiltered starting view)
-df = pd.DataFrame.from_records(shelter.read({}))
+def to_table_row(document):
+    """
+    Convert a MongoDB document (or record store row) into a DataTable row.
+
+    The ObjectId is not a displayed column; it is kept as the row 'id'
+    (hex string) so the table can track rows between callbacks.
+    """
+    row = {key: value for key, value in document.items() if key != '_id'}
+    if '_id' in document:
+        row['id'] = str(document['_id'])
+    return row
+
+
+# Retrieve ALL documents (unfiltered starting view) into the compact
+# columnar store, ProjectTwoDashboardServer shares it between workers.
+# Streamed rather than read() so the stale cache keeps no dict copies
+records = RecordStore.from_documents(list(shelter.stream({})))
+
+# Table columns, without the MongoDB ObjectId to prevent DataTable crash
+table_columns = [column for column in records.kinds if column != '_id']
+
+# Server side search over name, breed and color, holding record views
+# replaced by the change watcher as documents change
+search_index = SearchIndex()
+search_index.build(records)
+
+# Follows collection changes for live updates, started lazily per worker
+watcher = ChangeWatcher(shelter)
+watcher.add_observer(search_index)
+
+# Milliseconds between incremental update checks
+LIVE_UPDATE_INTERVAL = 5000
+
+# Merges the changed rows sent by apply_changes into the table in the
+# browser, by row id, so live updates need no table upload and no state
+# in the worker process that answered the page load
+APPLY_TABLE_CHANGES = """
+function(changes, rows) {
+    if (!changes) {
+        return window.dash_clientside.no_update;
+    }
+    // Rows by id in table order, set() keeps the place of a replaced row
+    const byId = new Map((rows || []).map(row => [row.id, row]));
+    for (const change of changes.changes) {
+        if (change.row === null) {
+            byId.delete(change.id);
+        } else if (byId.has(change.id) || changes.limit === null || byId.size < changes.limit) {
+            byId.set(change.id, change.row);
+        }
+    }
+    return Array.from(byId.values());
+}
+"""
 
-# Remove MongoDB ObjectId column to prevent DataTable crash
-if '_id' in df.columns:
-    df.drop(columns=['_id'], inplace=True)
+# Seconds of typing pause before a search runs, and rows returned
+SEARCH_DEBOUNCE = 0.3
+SEARCH_LIMIT = 100
 
 # Dashboard Layout & View
 
@@ -87,16 +165,32 @@ app.layout = html.Div([
             inputStyle={'marginRight': '5px', 'marginLeft': '15px'},
         ),
     ]),
+
+    # Download links for the selected rescue type, streamed by /export
+    html.Div(id='export-links', style={'margin': '10px 0'}),
     html.Hr(),
 
+    # Search box, queried server side after typing pauses
+    html.Div([
+        html.Label("Search by Name, Breed or Color:", style={'fontWeight': 'bold', 'fontSize': '16px'}),
+        dcc.Input(
+            id='search-input',
+            type='search',
+            debounce=SEARCH_DEBOUNCE,
+            placeholder='e.g. labrador, buddy',
+            style={'marginLeft': '10px', 'width': '300px'},
+        ),
+    ], style={'margin': '10px 0'}),
+
     # Interactive data table
     dash_table.DataTable(
         id='datatable-id',
         columns=[
             {"name": i, "id": i, "deletable": False, "selectable": True}
-            for i in df.columns
+            for i in table_columns
         ],
-        data=df.to_dict('records'),
+        # Rows are filled by update_dashboard when the page loads
+        data=[],
         page_size=10,
         sort_action='native',
         filter_action='native',
@@ -112,6 +206,11 @@ app.layout = html.Div([
         },
     ),
 
+    # Live updates from the change watcher
+    dcc.Interval(id='change-interval', interval=LIVE_UPDATE_INTERVAL),
+    dcc.Store(id='change-position'),
+    dcc.Store(id='table-changes'),
+
     html.Br(),
     html.Hr(),
 
@@ -137,68 +236,166 @@ app.layout = html.Div([
 
 # Interaction between Components & Controller
 
-def build_rescue_query(filter_type):
+# Streaming CSV/JSONL/Parquet exports of the rescue profiles
+register_export_routes(app.server, shelter)
+
+
+@app.callback(
+    Output('export-links', 'children'),
+    [Input('filter-type', 'value')]
+)
+def update_export_links(filter_type):
+    """Point the export links at the selected rescue type."""
+    return [html.Span("Export: ", style={'fontWeight': 'bold'})] + [
+        html.A(
+            export_format.upper(),
+            href=f'/export/{filter_type}.{export_format}',
+            style={'marginRight': '10px'},
+        )
+        for export_format in EXPORT_FORMATS
+    ]
+
+
+def current_rows(query):
     """
-    Build a MongoDB query dict based on the selected rescue type.
+    Table rows for the documents matching a query, read from MongoDB.
 
-    Rescue type breed/age/sex criteria from the Grazioso Salvare
-    Dashboard Specifications (Preferred Dog Breeds Table).
+    Streamed rather than read() so the stale cache keeps no copies of
+    large result sets.
+
+    param query: MongoDB query
+    return: list of DataTable rows in _id order
+    raise: CRUDError if MongoDB could not be read
     """
-    if filter_type == 'water':
-        return {
-            "animal_type": "Dog",
-            "breed": {"$in": [
-                "Labrador Retriever Mix",
-                "Chesapeake Bay Retr Mix",
-                "Newfoundland",
-            ]},
-            "sex_upon_outcome": "Intact Female",
-            "age_upon_outcome_in_weeks": {"$gte": 26, "$lte": 156},
-        }
-    elif filter_type == 'mountain':
-        return {
-            "animal_type": "Dog",
-            "breed": {"$in": [
-                "German Shepherd",
-                "Alaskan Malamute",
-                "Old English Sheepdog",
-                "Siberian Husky",
-                "Rottweiler",
-            ]},
-            "sex_upon_outcome": "Intact Male",
-            "age_upon_outcome_in_weeks": {"$gte": 26, "$lte": 156},
-        }
-    elif filter_type == 'disaster':
-        return {
-            "animal_type": "Dog",
-            "breed": {"$in": [
-                "Doberman Pinscher",
-                "German Shepherd",
-                "Golden Retriever",
-                "Bloodhound",
-                "Rottweiler",
-            ]},
-            "sex_upon_outcome": "Intact Male",
-            "age_upon_outcome_in_weeks": {"$gte": 20, "$lte": 300},
-        }
-    else:
-        # Reset — return all animals
-        return {}
+    return [to_table_row(document) for document in shelter.stream(query)]
+
+
+def is_searching(search_text):
+    """Return True if the search box holds search text."""
+    return bool(search_text and search_text.strip())
+
+
+def filtered_view(filter_type, search_text=None):
+    """
+    Table rows for a rescue type and optional search text.
+
+    Without search text every animal of the rescue type is listed,
+    otherwise the best SEARCH_LIMIT matches within it, ranked.
+    """
+    query = build_rescue_query(filter_type)
+
+    if is_searching(search_text):
+        # Rows of the rescue type are selected on the store arrays before
+        # scoring; the predicate covers changed documents
+        results = search_index.search(
+            search_text,
+            limit=SEARCH_LIMIT,
+            predicate=lambda document: matches_query(document, query),
+            rows=records.mask(query),
+        )
+        return [to_table_row(document) for score, document in results]
+
+    # Keep the current table rather than showing an empty one
+    try:
+        return current_rows(query)
+    except CRUDError as error:
+        print(error)
+        return no_update
 
 
 @app.callback(
     Output('datatable-id', 'data'),
-    [Input('filter-type', 'value')]
+    Input('filter-type', 'value'),
+    State('search-input', 'value'),
 )
-def update_dashboard(filter_type):
-    """Filter the data table based on the selected rescue type."""
-    query = build_rescue_query(filter_type)
-    filtered = pd.DataFrame.from_records(shelter.read(query))
+def update_dashboard(filter_type, search_text=None):
+    """Filter the data table based on the selected rescue type (and search text)."""
+    return filtered_view(filter_type, search_text)
 
-    if '_id' in filtered.columns:
-        filtered.drop(columns=['_id'], inplace=True)
 
-    return filtered.to_dict('records')
+@app.callback(
+    Output('datatable-id', 'data', allow_duplicate=True),
+    Input('search-input', 'value'),
+    State('filter-type', 'value'),
+    prevent_initial_call=True,
+)
+def update_search(search_text, filter_type):
+    """Rank animals matching the search text within the selected rescue type."""
+    return filtered_view(filter_type, search_text)
+
+
+def table_changes(events, query, search_text=None):
+    """
+    Changed table rows for change watcher events.
+
+    Inserted or updated documents are kept only if they still match the
+    active rescue query and search text; replaying an event already
+    applied is harmless.
+
+    param events: change watcher events
+    param query: active rescue query
+    param search_text: active search text, or None
+    return: list of {'id': row id, 'row': DataTable row, or None to remove it}
+    """
+    searching = is_searching(search_text)
+    changes = []
+
+    for event in events:
+        document = event['document']
+        keep = (
+            event['op'] != 'delete'
+            and matches_query(document, query)
+            and (not searching or search_index.matches(search_text, document))
+        )
+        changes.append({'id': event['id'], 'row': to_table_row(document) if keep else None})
+
+    return changes
+
+
+@app.callback(
+    Output('datatable-id', 'data', allow_duplicate=True),
+    Output('table-changes', 'data'),
+    Output('change-position', 'data'),
+    Input('change-interval', 'n_intervals'),
+    State('change-position', 'data'),
+    State('filter-type', 'value'),
+    State('search-input', 'value'),
+    prevent_initial_call=True,
+)
+def apply_changes(n_intervals, position, filter_type, search_text=None):
+    """
+    Send collection changes to the browser without a full reload.
+
+    Only the changed rows are sent, APPLY_TABLE_CHANGES merges them into
+    the table by row id; any worker process can answer.
+    """
+    watcher.start()
+    latest, events = watcher.changes_since(position)
+
+    if events is not None and not events:
+        return no_update, no_update, latest
+
+    # Too far behind the retained history: reload the filtered set
+    if events is None:
+        data = filtered_view(filter_type, search_text)
+        # Keep the old position so the reload is retried
+        return data, no_update, position if data is no_update else latest
+
+    changes = {
+        'changes': table_changes(events, build_rescue_query(filter_type), search_text),
+        # Search results stay within SEARCH_LIMIT rows
+        'limit': SEARCH_LIMIT if is_searching(search_text) else None,
+    }
+    return no_update, changes, latest
+
+
+app.clientside_callback(
+    APPLY_TABLE_CHANGES,
+    Output('datatable-id', 'data', allow_duplicate=True),
+    Input('table-changes', 'data'),
+    State('datatable-id', 'data'),
+    prevent_initial_call=True,
+)
 
 
 @app.callback(
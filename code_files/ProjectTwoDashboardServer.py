@@ -0,0 +1,145 @@
+"""
+Project Two
+CS-340 Client/Server Development (7-2)
+
+Production entry point for the Grazioso Salvare dashboard.
+Serves the Flask server behind ProjectTwoDashboardApp (app.server)
+with gunicorn using multiple worker processes and threads instead
+of the single-process Dash development server.
+
+Usage:
+    python ProjectTwoDashboardServer.py
+    gunicorn -c ProjectTwoDashboardServer.py ProjectTwoDashboardServer:server
+
+Environment variables:
+    DASH_BIND     address to listen on (default 0.0.0.0:8050)
+    DASH_WORKERS  worker processes (default 2 * cores + 1)
+    DASH_THREADS  threads per worker (default 4)
+    DASH_TIMEOUT  worker timeout in seconds (default 60)
+
+Date: 2/22/2026
+Maintainer: Kyle Gortych
+"""
+
+import gc
+import multiprocessing
+import os
+
+from ProjectTwoDashboardApp import app, records, shelter, watcher
+
+# Server Configuration
+
+# One year, static assets are fingerprinted by Dash
+STATIC_MAX_AGE = 60 * 60 * 24 * 365
+
+# Smaller responses are not worth the compression overhead
+COMPRESS_MIN_SIZE = 500
+
+bind = os.getenv("DASH_BIND", "0.0.0.0:8050")
+workers = int(os.getenv("DASH_WORKERS", multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.getenv("DASH_THREADS", 4))
+timeout = int(os.getenv("DASH_TIMEOUT", 60))
+worker_class = "gthread"
+
+# Import the app once in the master so the records loaded at import
+# time are shared by every forked worker
+preload_app = True
+
+
+def on_exit(server):
+    """Gunicorn hook run in the master on shutdown, frees the shared records."""
+    records.unlink()
+
+
+def post_fork(server, worker):
+    """
+    Gunicorn hook run in each worker after fork.
+
+    MongoClient is not fork-safe, so every worker opens its own client,
+    and threads do not survive fork, so the change watcher starts here.
+    """
+    shelter.reconnect()
+    watcher.start()
+
+
+def configure_server(dash_app):
+    """
+    Enable response compression and long-lived caching of static files.
+
+    Compression uses flask-compress (brotli when the brotli package is
+    installed, gzip otherwise) and covers the JSON callback responses.
+    """
+    flask_server = dash_app.server
+    flask_server.config["SEND_FILE_MAX_AGE_DEFAULT"] = STATIC_MAX_AGE
+
+    try:
+        from flask_compress import Compress
+    except ImportError:
+        print("flask-compress not installed, responses will not be compressed")
+        return flask_server
+
+    # gunicorn -c executes this file as well as importing it
+    if "compress" in flask_server.extensions:
+        return flask_server
+
+    # Encoding is negotiated per request from the Accept-Encoding header
+    flask_server.config["COMPRESS_ALGORITHM"] = ["br", "gzip"]
+    flask_server.config["COMPRESS_MIN_SIZE"] = COMPRESS_MIN_SIZE
+    flask_server.config["COMPRESS_MIMETYPES"] = [
+        "application/json",
+        "application/javascript",
+        "text/css",
+        "text/html",
+    ]
+    Compress(flask_server)
+    flask_server.extensions["compress"] = True
+
+    return flask_server
+
+
+def gunicorn_options():
+    """Return the gunicorn settings defined in this module."""
+    return {
+        "bind": bind,
+        "workers": workers,
+        "threads": threads,
+        "timeout": timeout,
+        "worker_class": worker_class,
+        "preload_app": preload_app,
+        "post_fork": post_fork,
+        "on_exit": on_exit,
+    }
+
+
+# Move the record store into shared memory before the workers fork,
+# so they all map one copy (once, gunicorn -c also executes this file)
+if records.segment is None:
+    records.share()
+
+# Keep the objects built at import out of garbage collection, so the
+# collector in each worker does not write to (and copy) their pages
+gc.freeze()
+
+# WSGI callable for gunicorn
+server = configure_server(app)
+
+
+def run():
+    """Serve the dashboard with gunicorn using gunicorn_options()."""
+    from gunicorn.app.base import BaseApplication
+
+    class DashboardApplication(BaseApplication):
+
+        def load_config(self):
+            for key, value in gunicorn_options().items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            return server
+
+    DashboardApplication().run()
+
+
+# Run server
+if __name__ == '__main__':
+    run()
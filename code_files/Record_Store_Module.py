@@ -0,0 +1,407 @@
+"""
+Record Store Module for the Animal collection
+
+Column oriented, compact in-memory copy of the animal documents used
+by the dashboard in place of per-worker DataFrames and lists of dicts.
+
+- strings are dictionary encoded: int32 codes plus one UTF-8 blob of
+  the distinct values (breed, color, sex, outcome type, ...)
+- coordinates and ages are float32, other numbers int64 or float64
+- date/time strings are int64 epoch seconds, formatted back on access
+- rows are read through AnimalRecord views (__slots__, no per row dict)
+
+share() moves every array into a single shared memory segment, so all
+worker processes map one copy, and attach() opens it from another
+process by name.
+"""
+
+import json
+import math
+from datetime import datetime, timezone
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+# Column types, columns not listed are inferred from their values
+FLOAT32_COLUMNS = ('location_lat', 'location_long', 'age_upon_outcome_in_weeks')
+DATETIME_COLUMNS = ('datetime', 'date_of_birth', 'monthyear')
+
+# Date/time string formats recognised for DATETIME_COLUMNS
+DATETIME_FORMATS = ('%Y-%m-%d %H:%M:%S', '%Y-%m-%dT%H:%M:%S', '%Y-%m-%d')
+
+# Missing values
+NULL_CODE = -1
+NULL_TIME = np.iinfo(np.int64).min
+
+# Dictionaries up to this size are decoded once and cached per process
+DECODE_CACHE_LIMIT = 4096
+
+# Alignment of arrays inside the shared memory segment
+ALIGNMENT = 8
+
+
+def _encode_strings(values):
+    """Dictionary encode strings into (codes, offsets, blob) arrays."""
+    lookup = {}
+    codes = np.empty(len(values), dtype=np.int32)
+
+    for row, value in enumerate(values):
+        if value is None or (isinstance(value, float) and math.isnan(value)):
+            codes[row] = NULL_CODE
+        else:
+            codes[row] = lookup.setdefault(str(value), len(lookup))
+
+    encoded = [value.encode() for value in lookup]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(value) for value in encoded], dtype=np.int64)
+    blob = np.frombuffer(b''.join(encoded), dtype=np.uint8).copy()
+
+    return codes, offsets, blob
+
+
+def _detect_format(values):
+    """Return the DATETIME_FORMATS entry matching the first string value, or None."""
+    for value in values:
+        if isinstance(value, str):
+            for time_format in DATETIME_FORMATS:
+                try:
+                    datetime.strptime(value, time_format)
+                    return time_format
+                except ValueError:
+                    continue
+            return None
+    return None
+
+
+def _encode_times(values, time_format):
+    """Parse date/time strings into int64 epoch seconds, None if any fails."""
+    try:
+        parsed = pd.to_datetime(pd.Series(values, dtype=object), format=time_format, errors='raise')
+    except (ValueError, TypeError):
+        return None
+
+    seconds = np.full(len(values), NULL_TIME, dtype=np.int64)
+    present = parsed.notna().to_numpy()
+    seconds[present] = parsed[present].astype('datetime64[s]').to_numpy().astype(np.int64)
+    return seconds
+
+
+def _is_integer(value):
+    return isinstance(value, (int, np.integer)) and not isinstance(value, bool)
+
+
+def _is_number(value):
+    return isinstance(value, (int, float, np.integer, np.floating)) and not isinstance(value, bool)
+
+
+class AnimalRecord:
+    """
+    Read-only dict-like view of one row of a RecordStore.
+    """
+
+    __slots__ = ('store', 'row')
+
+    def __init__(self, store, row):
+        self.store = store
+        self.row = row
+
+    def __getitem__(self, column):
+        if column not in self.store.kinds:
+            raise KeyError(column)
+        return self.store.value(column, self.row)
+
+    def __contains__(self, column):
+        return column in self.store.kinds
+
+    def get(self, column, default=None):
+        if column not in self.store.kinds:
+            return default
+        value = self.store.value(column, self.row)
+        return default if value is None else value
+
+    def keys(self):
+        return self.store.kinds.keys()
+
+    def items(self):
+        return ((column, self.store.value(column, self.row)) for column in self.store.kinds)
+
+    def to_dict(self):
+        return dict(self.items())
+
+    def __repr__(self):
+        return f"AnimalRecord({self.to_dict()!r})"
+
+
+class RecordStore:
+    """
+    Columnar store of animal documents.
+
+    kinds maps each column to 'string', 'int64', 'float32', 'float64' or 'time';
+    arrays holds the numpy arrays backing each column.
+    """
+
+    def __init__(self, kinds, arrays, formats, length, segment=None):
+        self.kinds = kinds
+        self.arrays = arrays
+        self.formats = formats
+        self.length = length
+        self.segment = segment
+        self._decoded = {}
+
+    @classmethod
+    def from_documents(cls, documents):
+        """
+        Build a store from MongoDB documents.
+
+        The ObjectId is kept as its hex string in the '_id' column.
+
+        param documents: list of dict documents
+        return: RecordStore
+        """
+        columns = []
+        for document in documents:
+            for column in document:
+                if column not in columns:
+                    columns.append(column)
+
+        kinds, arrays, formats = {}, {}, {}
+        for column in columns:
+            values = [document.get(column) for document in documents]
+            present = [value for value in values if value is not None]
+
+            if column in DATETIME_COLUMNS:
+                time_format = _detect_format(present)
+                seconds = _encode_times(values, time_format) if time_format else None
+                if seconds is not None:
+                    kinds[column] = 'time'
+                    formats[column] = time_format
+                    arrays[column] = seconds
+                    continue
+
+            if values and column not in FLOAT32_COLUMNS and all(_is_integer(value) for value in values):
+                kinds[column] = 'int64'
+                arrays[column] = np.array(values, dtype=np.int64)
+                continue
+
+            if present and all(_is_number(value) for value in present):
+                dtype = np.float32 if column in FLOAT32_COLUMNS else np.float64
+                kinds[column] = 'float32' if dtype is np.float32 else 'float64'
+                arrays[column] = np.array(
+                    [np.nan if value is None else value for value in values], dtype=dtype
+                )
+                continue
+
+            kinds[column] = 'string'
+            codes, offsets, blob = _encode_strings(values)
+            arrays[column] = codes
+            arrays[f'{column}.offsets'] = offsets
+            arrays[f'{column}.blob'] = blob
+
+        return cls(kinds, arrays, formats, len(documents))
+
+    def __len__(self):
+        return self.length
+
+    def __getitem__(self, row):
+        if not -self.length <= row < self.length:
+            raise IndexError(row)
+        return AnimalRecord(self, row % self.length)
+
+    def __iter__(self):
+        return (AnimalRecord(self, row) for row in range(self.length))
+
+    @property
+    def nbytes(self):
+        """Bytes used by the column arrays."""
+        return sum(array.nbytes for array in self.arrays.values())
+
+    def value(self, column, row):
+        """Decode a single value as a Python object."""
+        kind = self.kinds[column]
+        raw = self.arrays[column][row]
+
+        if kind == 'string':
+            return None if raw == NULL_CODE else self.category(column, int(raw))
+        if kind == 'time':
+            if raw == NULL_TIME:
+                return None
+            moment = datetime.fromtimestamp(int(raw), tz=timezone.utc)
+            return moment.strftime(self.formats[column])
+        if kind == 'int64':
+            return int(raw)
+        if np.isnan(raw):
+            return None
+        # Shortest repr, so float32 52.14 reads back as 52.14
+        return float(str(raw)) if kind == 'float32' else float(raw)
+
+    def category(self, column, code):
+        """Decode a dictionary code of a string column."""
+        cached = self._decoded.get(column)
+        if cached is not None:
+            return cached[code]
+
+        offsets = self.arrays[f'{column}.offsets']
+        blob = self.arrays[f'{column}.blob']
+
+        if len(offsets) - 1 <= DECODE_CACHE_LIMIT:
+            data = blob.tobytes()
+            cached = [data[offsets[i]:offsets[i + 1]].decode() for i in range(len(offsets) - 1)]
+            self._decoded[column] = cached
+            return cached[code]
+
+        return blob[offsets[code]:offsets[code + 1]].tobytes().decode()
+
+    def codes(self, column, values):
+        """
+        Dictionary codes of values of a string column.
+
+        param column: string column
+        param values: strings, None for missing values
+        return: list of codes, NULL_CODE for None; values never seen are left out
+        """
+        wanted = {value for value in values if value is not None}
+        codes = [NULL_CODE] if None in values else []
+        categories = len(self.arrays[f'{column}.offsets']) - 1
+        codes.extend(code for code in range(categories) if self.category(column, code) in wanted)
+        return codes
+
+    def mask(self, query):
+        """
+        Rows matching a MongoDB filter, evaluated on the column arrays.
+
+        Supports what matches_query() does for string and number columns:
+        top level equality, $in, $nin and $ne, and $gt, $gte, $lt and $lte
+        on numbers.
+
+        param query: dict MongoDB filter
+        return: boolean array over the rows, or None when the filter needs
+            documents to be matched one at a time
+        """
+        selected = np.ones(self.length, dtype=bool)
+        for column, condition in query.items():
+            if self.kinds.get(column) == 'time':
+                return None
+
+            conditions = condition.items() if isinstance(condition, dict) else [('$eq', condition)]
+            for operator, operand in conditions:
+                matched = self._match(column, operator, operand)
+                if matched is None:
+                    return None
+                selected &= matched
+
+        return selected
+
+    def _match(self, column, operator, operand):
+        """Rows of one column matching one operator, or None if unsupported."""
+        kind = self.kinds.get(column)
+
+        if operator in ('$gt', '$gte', '$lt', '$lte'):
+            if kind is None:
+                # None in every document, never in a range
+                return np.zeros(self.length, dtype=bool)
+            if kind == 'string' or not _is_number(operand):
+                return None
+            # NaN (missing) compares False, as None does in matches_query
+            array = self.arrays[column]
+            return {
+                '$gt': array > operand,
+                '$gte': array >= operand,
+                '$lt': array < operand,
+                '$lte': array <= operand,
+            }[operator]
+
+        if operator not in ('$eq', '$ne', '$in', '$nin'):
+            return None
+        values = list(operand) if operator in ('$in', '$nin') else [operand]
+
+        if kind is None:
+            matched = np.full(self.length, None in values)
+        elif kind == 'string':
+            if not all(value is None or isinstance(value, str) for value in values):
+                return None
+            matched = np.isin(self.arrays[column], self.codes(column, values))
+        else:
+            if not all(value is None or _is_number(value) for value in values):
+                return None
+            array = self.arrays[column]
+            matched = np.isin(array, [value for value in values if value is not None])
+            if None in values and kind != 'int64':
+                matched |= np.isnan(array)
+
+        return matched if operator in ('$eq', '$in') else ~matched
+
+    def share(self, name=None):
+        """
+        Move the column arrays into one shared memory segment.
+
+        The creating process owns the segment and should call unlink()
+        when it is no longer needed; other processes use attach().
+
+        param name: optional segment name, generated when None
+        return: self, with arrays now backed by shared memory
+        """
+        layout, position = {}, 0
+        for key, array in self.arrays.items():
+            position = -(-position // ALIGNMENT) * ALIGNMENT
+            layout[key] = [array.dtype.str, len(array), position]
+            position += array.nbytes
+
+        header = json.dumps({
+            'kinds': self.kinds,
+            'formats': self.formats,
+            'length': self.length,
+            'layout': layout,
+        }).encode()
+        start = -(-(8 + len(header)) // ALIGNMENT) * ALIGNMENT
+
+        segment = shared_memory.SharedMemory(name=name, create=True, size=max(start + position, 1))
+        segment.buf[:8] = len(header).to_bytes(8, 'little')
+        segment.buf[8:8 + len(header)] = header
+
+        arrays = {}
+        for key, (dtype, length, offset) in layout.items():
+            shared = np.ndarray(length, dtype=dtype, buffer=segment.buf, offset=start + offset)
+            shared[:] = self.arrays[key]
+            shared.flags.writeable = False
+            arrays[key] = shared
+
+        self.arrays = arrays
+        self.segment = segment
+        return self
+
+    @classmethod
+    def attach(cls, name):
+        """
+        Open a store shared by another process with share().
+
+        param name: shared memory segment name
+        return: RecordStore backed by the segment
+        """
+        segment = shared_memory.SharedMemory(name=name)
+        header_length = int.from_bytes(bytes(segment.buf[:8]), 'little')
+        header = json.loads(bytes(segment.buf[8:8 + header_length]))
+        start = -(-(8 + header_length) // ALIGNMENT) * ALIGNMENT
+
+        arrays = {}
+        for key, (dtype, length, offset) in header['layout'].items():
+            array = np.ndarray(length, dtype=dtype, buffer=segment.buf, offset=start + offset)
+            array.flags.writeable = False
+            arrays[key] = array
+
+        return cls(header['kinds'], arrays, header['formats'], header['length'], segment)
+
+    def close(self):
+        """Release this process's mapping of the shared memory segment."""
+        if self.segment is not None:
+            self.arrays = {}
+            self._decoded = {}
+            self.segment.close()
+            self.segment = None
+
+    def unlink(self):
+        """Close and remove the shared memory segment (creator only)."""
+        if self.segment is not None:
+            segment = self.segment
+            self.close()
+            segment.unlink()
@@ -0,0 +1,58 @@
+"""
+Rescue Query Module for Grazioso Salvare
+
+MongoDB queries for each rescue type, shared by the dashboard and the
+export CLI so the CLI does not need to import the Dash app.
+"""
+
+# Rescue types with a query, 'reset' returns all animals
+RESCUE_PROFILES = ('water', 'mountain', 'disaster')
+
+
+def build_rescue_query(filter_type):
+    """
+    Build a MongoDB query dict based on the selected rescue type.
+
+    Rescue type breed/age/sex criteria from the Grazioso Salvare
+    Dashboard Specifications (Preferred Dog Breeds Table).
+    """
+    if filter_type == 'water':
+        return {
+            "animal_type": "Dog",
+            "breed": {"$in": [
+                "Labrador Retriever Mix",
+                "Chesapeake Bay Retr Mix",
+                "Newfoundland",
+            ]},
+            "sex_upon_outcome": "Intact Female",
+            "age_upon_outcome_in_weeks": {"$gte": 26, "$lte": 156},
+        }
+    elif filter_type == 'mountain':
+        return {
+            "animal_type": "Dog",
+            "breed": {"$in": [
+                "German Shepherd",
+                "Alaskan Malamute",
+                "Old English Sheepdog",
+                "Siberian Husky",
+                "Rottweiler",
+            ]},
+            "sex_upon_outcome": "Intact Male",
+            "age_upon_outcome_in_weeks": {"$gte": 26, "$lte": 156},
+        }
+    elif filter_type == 'disaster':
+        return {
+            "animal_type": "Dog",
+            "breed": {"$in": [
+                "Doberman Pinscher",
+                "German Shepherd",
+                "Golden Retriever",
+                "Bloodhound",
+                "Rottweiler",
+            ]},
+            "sex_upon_outcome": "Intact Male",
+            "age_upon_outcome_in_weeks": {"$gte": 20, "$lte": 300},
+        }
+    else:
+        # Reset — return all animals
+        return {}
@@ -0,0 +1,270 @@
+"""
+Rollup Module for the Animal collection
+
+Maintains pre-aggregated summary collections so dashboard charts are
+answered from counts instead of scanning raw animal documents.
+
+There is one small summary collection per chart (ROLLUPS), keyed only
+by the dimensions that chart groups or filters on: outcomes per month,
+breed by outcome type and the rescue profile age histogram. Each holds
+one count per distinct combination of its few dimensions, far fewer
+documents than the raw collection, and is indexed on those dimensions.
+"""
+
+from collections import Counter
+
+from pymongo import UpdateOne
+from pymongo.errors import PyMongoError
+
+from CRUD_Python_Module import CRUDError
+
+# Summary dimensions and the raw document field each is taken from
+DIMENSIONS = {
+    'month': 'datetime',
+    'animal_type': 'animal_type',
+    'breed': 'breed',
+    'sex': 'sex_upon_outcome',
+    'outcome': 'outcome_type',
+    'age_bucket': 'age_upon_outcome_in_weeks',
+}
+
+# Summary collections, one per chart, and the dimensions each is keyed
+# by (filtered dimensions first, they lead the index)
+ROLLUPS = {
+    'outcomes_per_month': ('animal_type', 'month', 'outcome'),
+    'breed_by_outcome': ('sex', 'breed', 'outcome'),
+    'age_histogram': ('animal_type', 'sex', 'breed', 'age_bucket'),
+}
+
+# Width in weeks of each age histogram bucket
+AGE_BUCKET_WEEKS = 13
+
+
+def rollup_key(document, bucket_weeks=AGE_BUCKET_WEEKS):
+    """
+    Return the summary key a raw animal document is counted under.
+
+    param document: dict animal document
+    param bucket_weeks: width of the age buckets in weeks
+    return: dict of dimension name to value
+    """
+    key = {}
+
+    for dimension, field in DIMENSIONS.items():
+        value = document.get(field)
+
+        if value is None:
+            key[dimension] = None
+        elif dimension == 'month':
+            # 'YYYY-MM' from a datetime or an ISO formatted string
+            key[dimension] = str(value).replace(' ', 'T')[:7]
+        elif dimension == 'age_bucket':
+            # Ages that are not numbers are counted without a bucket
+            is_number = isinstance(value, (int, float)) and not isinstance(value, bool)
+            key[dimension] = int(value // bucket_weeks * bucket_weeks) if is_number else None
+        else:
+            key[dimension] = value
+
+    return key
+
+
+class RollupStore:
+    """
+    Summary collections kept up to date from writes made through CRUD.
+
+    Register with crud.add_observer(store) so inserts, updates and
+    deletes adjust the counts incrementally; rebuild() recomputes them
+    from the raw collection. needs_rebuild is set when an incremental
+    update failed and the counts may be off.
+    """
+
+    # Raw fields CRUD reads for updated or deleted documents
+    observed_fields = tuple(DIMENSIONS.values())
+
+    def __init__(self, crud, prefix=None, bucket_weeks=AGE_BUCKET_WEEKS):
+        """
+        param crud: CRUD instance for the raw animal collection
+        param prefix: summary collection name prefix, defaults to '<raw>_rollup'
+        param bucket_weeks: width of the age buckets in weeks
+        """
+        self.crud = crud
+        self.prefix = prefix or f"{crud.collection_name}_rollup"
+        self.bucket_weeks = bucket_weeks
+        self.needs_rebuild = False
+
+    def collection_name(self, rollup):
+        """Name of the summary collection of a ROLLUPS entry."""
+        return f"{self.prefix}_{rollup}"
+
+    def collection(self, rollup):
+        # Looked up on each use so it follows crud.reconnect()
+        return self.crud.database[self.collection_name(rollup)]
+
+    def documents_changed(self, removed, added):
+        """
+        Adjust summary counts for documents written through CRUD.
+
+        param removed: documents as they were before the write
+        param added: documents as they are after the write
+        raise: CRUDError if a summary collection could not be updated,
+               needs_rebuild is set on any failure
+        """
+        try:
+            removed_keys = [rollup_key(document, self.bucket_weeks) for document in removed]
+            added_keys = [rollup_key(document, self.bucket_weeks) for document in added]
+
+            for rollup, dimensions in ROLLUPS.items():
+                deltas = Counter()
+                for key in removed_keys:
+                    deltas[tuple(key[dimension] for dimension in dimensions)] -= 1
+                for key in added_keys:
+                    deltas[tuple(key[dimension] for dimension in dimensions)] += 1
+
+                requests = [
+                    UpdateOne({'_id': dict(zip(dimensions, values))}, {'$inc': {'count': delta}}, upsert=True)
+                    for values, delta in deltas.items() if delta
+                ]
+                if not requests:
+                    continue
+
+                collection = self.collection(rollup)
+                collection.bulk_write(requests, ordered=False)
+                collection.delete_many({'count': {'$lte': 0}})
+        except PyMongoError as error:
+            self.needs_rebuild = True
+            raise CRUDError('rollup', str(error), cause=error) from error
+        except Exception:
+            self.needs_rebuild = True
+            raise
+
+    def rebuild(self):
+        """
+        Recompute the summary collections from the raw collection.
+
+        Used to populate the rollups the first time, or to repair them.
+        """
+        size = self.bucket_weeks
+        # Same keys as rollup_key(), missing fields become null
+        key = {
+            'month': {'$cond': [
+                {'$ifNull': ['$datetime', False]},
+                {'$substrCP': [{'$toString': '$datetime'}, 0, 7]},
+                None,
+            ]},
+            'animal_type': {'$ifNull': ['$animal_type', None]},
+            'breed': {'$ifNull': ['$breed', None]},
+            'sex': {'$ifNull': ['$sex_upon_outcome', None]},
+            'outcome': {'$ifNull': ['$outcome_type', None]},
+            'age_bucket': {'$cond': [
+                {'$isNumber': '$age_upon_outcome_in_weeks'},
+                {'$toInt': {'$multiply': [
+                    {'$floor': {'$divide': ['$age_upon_outcome_in_weeks', size]}}, size
+                ]}},
+                None,
+            ]},
+        }
+
+        try:
+            for rollup, dimensions in ROLLUPS.items():
+                pipeline = [
+                    {'$group': {
+                        '_id': {dimension: key[dimension] for dimension in dimensions},
+                        'count': {'$sum': 1},
+                    }},
+                    {'$out': self.collection_name(rollup)},
+                ]
+                self.crud.collection.aggregate(pipeline, allowDiskUse=True)
+
+                # Kept by later $out runs, creating it again is a no-op
+                self.collection(rollup).create_index(
+                    [(f'_id.{dimension}', 1) for dimension in dimensions]
+                )
+        except PyMongoError as error:
+            raise CRUDError('rollup', str(error), cause=error) from error
+        self.needs_rebuild = False
+
+    def counts(self, group_by, filters=None):
+        """
+        Count animals grouped by one or more dimensions.
+
+        Answered from the smallest summary collection covering the grouped
+        and filtered dimensions.
+
+        param group_by: dimension name, or list of dimension names
+        param filters: dict of dimension name to a value or list of values
+        return: dict of value (tuple of values for several dimensions) to count
+        raise: ValueError if no summary collection covers the dimensions
+        """
+        dimensions = [group_by] if isinstance(group_by, str) else list(group_by)
+        needed = set(dimensions) | set(filters or {})
+        for dimension in needed:
+            if dimension not in DIMENSIONS:
+                raise ValueError(f"Unknown rollup dimension: {dimension}")
+
+        covering = [rollup for rollup, keys in ROLLUPS.items() if needed <= set(keys)]
+        if not covering:
+            raise ValueError(f"No rollup covers dimensions: {sorted(needed)}")
+        rollup = min(covering, key=lambda name: len(ROLLUPS[name]))
+
+        match = {}
+        for dimension, value in (filters or {}).items():
+            if isinstance(value, (list, tuple, set)):
+                match[f'_id.{dimension}'] = {'$in': list(value)}
+            else:
+                match[f'_id.{dimension}'] = value
+
+        pipeline = [
+            {'$match': match},
+            {'$group': {
+                '_id': {dimension: f'$_id.{dimension}' for dimension in dimensions},
+                'count': {'$sum': '$count'},
+            }},
+        ]
+
+        try:
+            results = self.collection(rollup).aggregate(pipeline)
+            counts = {}
+            for result in results:
+                values = tuple(result['_id'].get(dimension) for dimension in dimensions)
+                counts[values[0] if len(values) == 1 else values] = result['count']
+            return counts
+        except PyMongoError as error:
+            raise CRUDError('rollup', str(error), cause=error) from error
+
+    def outcomes_per_month(self, filters=None):
+        """Return {(month, outcome): count} for an outcomes over time chart."""
+        return self.counts(['month', 'outcome'], filters)
+
+    def breed_by_outcome(self, filters=None):
+        """Return {(breed, outcome): count} for a breed by outcome type chart."""
+        return self.counts(['breed', 'outcome'], filters)
+
+    def age_histogram(self, query):
+        """
+        Return {age_bucket: count} for a rescue profile.
+
+        param query: rescue profile query as built by build_rescue_query,
+                     its breed/sex/animal type are applied and buckets
+                     overlapping its age range are kept
+        """
+        filters = {}
+        for field, dimension in (('animal_type', 'animal_type'),
+                                 ('breed', 'breed'),
+                                 ('sex_upon_outcome', 'sex')):
+            condition = query.get(field)
+            if isinstance(condition, dict):
+                filters[dimension] = condition['$in']
+            elif condition is not None:
+                filters[dimension] = condition
+
+        histogram = self.counts('age_bucket', filters)
+
+        # Keep buckets inside the profile age range
+        age_range = query.get('age_upon_outcome_in_weeks', {})
+        low = age_range.get('$gte', float('-inf'))
+        high = age_range.get('$lte', float('inf'))
+        return {
+            bucket: histogram[bucket]
+            for bucket in sorted(bucket for bucket in histogram if bucket is not None)
+            if bucket + self.bucket_weeks > low and bucket <= high
+        }
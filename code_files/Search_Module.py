@@ -0,0 +1,397 @@
+"""
+Search Module for the Animal collection
+
+In-memory trigram index over animal name, breed and color for the
+dashboard search box. Supports prefix and typo tolerant matching and
+ranks results, answering in milliseconds over the whole collection
+without a round trip to MongoDB.
+
+The index is kept current as an observer of CRUD writes or of the
+change watcher: documents_changed(removed, added).
+"""
+
+import heapq
+import re
+import threading
+from bisect import bisect_left
+from collections import namedtuple
+
+import numpy as np
+
+from Record_Store_Module import AnimalRecord, RecordStore
+
+# Fields searched by default
+SEARCH_FIELDS = ('name', 'breed', 'color')
+
+# Minimum trigram similarity for a typo tolerant token match
+MIN_SIMILARITY = 0.4
+
+TOKEN_PATTERN = re.compile(r'[a-z0-9]+')
+
+# Arrays indexing the rows of a record store, never modified once built.
+# The rows containing vocabulary[i] are rows[offsets[i]:offsets[i + 1]];
+# trigrams maps a trigram to the vocabulary indices of tokens containing
+# it; ids are the store _ids sorted, with their rows in id_rows
+_StoreIndex = namedtuple(
+    '_StoreIndex', 'store vocabulary offsets rows trigrams trigram_counts ids id_rows'
+)
+
+# Documents changed since the build (or indexed from a list) keyed by
+# str(_id), their tokens, token -> ids postings, and the store rows they
+# removed or replaced. Replaced as a whole on every change, never modified
+_Overlay = namedtuple('_Overlay', 'documents document_tokens postings hidden')
+
+
+def tokenize(text):
+    """Lower case alphanumeric tokens of a string."""
+    return TOKEN_PATTERN.findall(str(text).lower())
+
+
+def trigrams(token):
+    """Trigrams of a token padded so short tokens and prefixes still match."""
+    padded = f"  {token} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class SearchIndex:
+    """
+    Trigram index of documents.
+
+    Rows of a RecordStore are indexed by row number in numpy arrays, so
+    the index of a store built before fork stays shared between worker
+    processes. Documents changed since, or given as a list, are held in a
+    small overlay keyed by _id that is scanned without trigrams.
+
+    Changes replace the overlay rather than modifying it, so searches
+    only hold the lock to take the current index and overlay.
+    """
+
+    def __init__(self, fields=SEARCH_FIELDS, min_similarity=MIN_SIMILARITY):
+        """
+        param fields: document fields to index
+        param min_similarity: trigram similarity needed for a fuzzy match
+        """
+        self.fields = fields
+        self.min_similarity = min_similarity
+
+        self._store_index = _index_store(RecordStore.from_documents([]), fields)
+        self._overlay = _Overlay({}, {}, {}, np.zeros(0, dtype=bool))
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        overlay = self._overlay
+        return len(overlay.hidden) - int(overlay.hidden.sum()) + len(overlay.documents)
+
+    @property
+    def store(self):
+        """RecordStore whose rows are indexed."""
+        return self._store_index.store
+
+    @property
+    def documents(self):
+        """Overlay documents keyed by str(_id)."""
+        return self._overlay.documents
+
+    def build(self, documents):
+        """
+        Replace the index contents.
+
+        param documents: RecordStore, indexed by row, or iterable of dict documents
+        """
+        if isinstance(documents, RecordStore):
+            store_index, added = _index_store(documents, self.fields), ()
+        else:
+            store_index, added = _index_store(RecordStore.from_documents([]), self.fields), documents
+
+        with self._lock:
+            self._store_index = store_index
+            self._overlay = self._changed(
+                _Overlay({}, {}, {}, np.zeros(len(store_index.store), dtype=bool)), (), added
+            )
+
+    def documents_changed(self, removed, added):
+        """
+        Observer hook, removes then re-adds changed documents.
+
+        Store rows of changed documents are hidden and the documents as
+        they are now kept in the overlay.
+
+        param removed: documents (or {'_id': ...}) no longer current
+        param added: documents as they are now
+        """
+        with self._lock:
+            self._overlay = self._changed(self._overlay, removed, added)
+
+    def search(self, text, limit=20, predicate=None, rows=None):
+        """
+        Rank documents matching every token of the search text.
+
+        Each query token matches an indexed token exactly (score 1.0),
+        as a prefix (0.9), or by trigram similarity for typos.
+
+        param text: search text
+        param limit: maximum number of results
+        param predicate: optional callable, only documents it accepts are returned
+        param rows: optional boolean array over the store rows, e.g. from
+            RecordStore.mask(), only rows it selects are ranked
+        return: list of (score, document), best first; store rows as AnimalRecord
+        """
+        query_tokens = tokenize(text)
+        if not query_tokens:
+            return []
+
+        with self._lock:
+            store_index, overlay = self._store_index, self._overlay
+
+        results = self._search_store(store_index, overlay.hidden, query_tokens, limit, predicate, rows)
+        results += self._search_overlay(overlay, query_tokens, limit, predicate)
+
+        best = heapq.nlargest(limit, results, key=lambda item: (item[0], item[1]))
+        return [(score, document) for score, document_id, document in best]
+
+    def _search_store(self, store_index, hidden, query_tokens, limit, predicate, rows):
+        """Best store rows as (score, id, AnimalRecord)."""
+        if not len(hidden):
+            return []
+
+        matched = ~hidden
+        if rows is not None:
+            matched &= rows
+
+        total = np.zeros(len(hidden), dtype=np.float32)
+        for query_token in query_tokens:
+            if not matched.any():
+                return []
+            indices, scores = self._scores(store_index, query_token)
+
+            # Best score per row for this query token
+            starts = store_index.offsets[indices]
+            lengths = store_index.offsets[indices + 1] - starts
+            # Positions of every posting of the matched tokens, in one gather
+            positions = np.arange(lengths.sum()) + np.repeat(starts - (np.cumsum(lengths) - lengths), lengths)
+            best = np.zeros(len(total), dtype=np.float32)
+            np.maximum.at(best, store_index.rows[positions], np.repeat(scores, lengths))
+
+            total += best
+            matched &= best > 0
+
+        # Highest score first, later rows first among equal scores
+        candidates = np.flatnonzero(matched)
+        ranked = candidates[np.lexsort((candidates, total[candidates]))[::-1]]
+
+        # The predicate only runs until limit rows are accepted
+        results = []
+        for row in ranked:
+            record = AnimalRecord(store_index.store, int(row))
+            if predicate is not None and not predicate(record):
+                continue
+            results.append((float(total[row]), str(store_index.store.value('_id', row)), record))
+            if len(results) == limit:
+                break
+        return results
+
+    def _search_overlay(self, overlay, query_tokens, limit, predicate):
+        """Best overlay documents as (score, id, document)."""
+        scores = None
+        for query_token in query_tokens:
+            # Best score per document for this query token
+            document_scores = {}
+            for token, document_ids in overlay.postings.items():
+                score = self._token_score(query_token, token)
+                if not score:
+                    continue
+                for document_id in document_ids:
+                    if score > document_scores.get(document_id, 0):
+                        document_scores[document_id] = score
+
+            if scores is None:
+                scores = document_scores
+            else:
+                scores = {
+                    document_id: scores[document_id] + score
+                    for document_id, score in document_scores.items()
+                    if document_id in scores
+                }
+            if not scores:
+                return []
+
+        if predicate is not None:
+            scores = {
+                document_id: score for document_id, score in scores.items()
+                if predicate(overlay.documents[document_id])
+            }
+
+        best = heapq.nlargest(limit, scores.items(), key=lambda item: (item[1], item[0]))
+        return [(score, document_id, overlay.documents[document_id]) for document_id, score in best]
+
+    def matches(self, text, document):
+        """
+        Return True if a document matches every token of the search text
+        the way search() would, e.g. for a document that just changed.
+
+        param text: search text
+        param document: dict document, indexed or not
+        return: True if every query token matches a document token
+        """
+        tokens = self._tokens(document)
+        return all(
+            any(self._token_score(query_token, token) for token in tokens)
+            for query_token in tokenize(text)
+        )
+
+    def _token_score(self, query_token, token):
+        """Score of one indexed token for a query token, 0 if it does not match."""
+        if token.startswith(query_token):
+            return 1.0 if token == query_token else 0.9
+
+        query_trigrams, token_trigrams = trigrams(query_token), trigrams(token)
+        similarity = 2 * len(query_trigrams & token_trigrams) / (len(query_trigrams) + len(token_trigrams))
+        return similarity * 0.8 if similarity >= self.min_similarity else 0
+
+    def _scores(self, store_index, query_token):
+        """Store vocabulary indices similar to a query token, with their scores."""
+        vocabulary = store_index.vocabulary
+        scores = np.zeros(len(vocabulary), dtype=np.float32)
+
+        # Typo tolerant matches by shared trigrams (Dice coefficient)
+        query_trigrams = trigrams(query_token)
+        shared = np.zeros(len(vocabulary), dtype=np.int32)
+        for trigram in query_trigrams:
+            indices = store_index.trigrams.get(trigram)
+            if indices is not None:
+                shared[indices] += 1
+        similarity = 2 * shared / (len(query_trigrams) + store_index.trigram_counts)
+        similar = similarity >= self.min_similarity
+        scores[similar] = similarity[similar] * 0.8
+
+        # Prefix matches from the sorted vocabulary, tokens are [a-z0-9]
+        start = bisect_left(vocabulary, query_token)
+        end = bisect_left(vocabulary, query_token + '~', start)
+        scores[start:end] = 0.9
+        if start < end and vocabulary[start] == query_token:
+            scores[start] = 1.0
+
+        indices = np.flatnonzero(scores)
+        return indices, scores[indices]
+
+    def _tokens(self, document):
+        tokens = set()
+        for field in self.fields:
+            if document.get(field) is not None:
+                tokens.update(tokenize(document[field]))
+        return tokens
+
+    def _changed(self, overlay, removed, added):
+        """Return a new overlay with documents removed then added, overlay is left as it is."""
+        documents = dict(overlay.documents)
+        document_tokens = dict(overlay.document_tokens)
+        postings = dict(overlay.postings)
+        hidden = overlay.hidden.copy()
+
+        # Postings sets are copied once per change, then modified freely
+        copied = set()
+
+        def ids_of(token):
+            if token not in copied:
+                postings[token] = set(postings.get(token, ()))
+                copied.add(token)
+            return postings[token]
+
+        def remove(document_id):
+            row = _row(self._store_index, document_id)
+            if row is not None:
+                hidden[row] = True
+
+            documents.pop(document_id, None)
+            for token in document_tokens.pop(document_id, ()):
+                ids = ids_of(token)
+                ids.discard(document_id)
+                if not ids:
+                    del postings[token]
+                    copied.discard(token)
+
+        for document in removed:
+            remove(str(document['_id']))
+
+        for document in added:
+            document_id = str(document['_id'])
+            remove(document_id)
+
+            tokens = self._tokens(document)
+            documents[document_id] = document
+            document_tokens[document_id] = tokens
+            for token in tokens:
+                ids_of(token).add(document_id)
+
+        hidden.flags.writeable = False
+        return _Overlay(documents, document_tokens, postings, hidden)
+
+
+def _index_store(store, fields):
+    """Index the given fields of every row of a record store."""
+    token_rows = {}
+    for field in fields:
+        for value, rows in _field_rows(store, field):
+            for token in set(tokenize(value)):
+                token_rows.setdefault(token, []).append(rows)
+
+    vocabulary = sorted(token_rows)
+    postings = [np.unique(np.concatenate(token_rows[token])) for token in vocabulary]
+    offsets = np.zeros(len(vocabulary) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(rows) for rows in postings], dtype=np.int64)
+
+    token_trigrams = {}
+    for index, token in enumerate(vocabulary):
+        for trigram in trigrams(token):
+            token_trigrams.setdefault(trigram, []).append(index)
+
+    ids = np.array(
+        [str(store.value('_id', row)).encode() for row in range(len(store))] if '_id' in store.kinds else [],
+        dtype=bytes,
+    )
+    id_rows = np.argsort(ids, kind='stable').astype(np.int32)
+
+    return _StoreIndex(
+        store=store,
+        vocabulary=vocabulary,
+        offsets=offsets,
+        rows=np.concatenate(postings).astype(np.int32) if postings else np.zeros(0, dtype=np.int32),
+        trigrams={trigram: np.array(indices, dtype=np.int32) for trigram, indices in token_trigrams.items()},
+        trigram_counts=np.array([len(trigrams(token)) for token in vocabulary], dtype=np.int32),
+        ids=ids[id_rows],
+        id_rows=id_rows,
+    )
+
+
+def _row(store_index, document_id):
+    """Store row of an _id, or None."""
+    key = document_id.encode()
+    index = np.searchsorted(store_index.ids, key)
+    if index < len(store_index.ids) and store_index.ids[index] == key:
+        return int(store_index.id_rows[index])
+    return None
+
+
+def _field_rows(store, field):
+    """Yield (value, rows) for each distinct value of a store column."""
+    if field not in store.kinds:
+        return
+
+    if store.kinds[field] == 'string':
+        # Group rows by dictionary code, decoding each value once
+        codes = store.arrays[field]
+        order = np.argsort(codes, kind='stable').astype(np.int32)
+        categories = len(store.arrays[f'{field}.offsets']) - 1
+        bounds = np.searchsorted(codes[order], np.arange(categories + 1))
+        for code in range(categories):
+            if bounds[code] < bounds[code + 1]:
+                yield store.category(field, code), order[bounds[code]:bounds[code + 1]]
+        return
+
+    rows = {}
+    for row in range(len(store)):
+        value = store.value(field, row)
+        if value is not None:
+            rows.setdefault(value, []).append(row)
+    for value, value_rows in rows.items():
+        yield value, np.array(value_rows, dtype=np.int32)
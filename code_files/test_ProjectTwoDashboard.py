@@ -43,6 +43,7 @@ class TestProjectTwoDashboard(unittest.TestCase):
 
         cls.mock_crud_instance = MagicMock()
         cls.mock_crud_instance.read.return_value = [cls.sample_record.copy()]
+        cls.mock_crud_instance.stream.return_value = [cls.sample_record.copy()]
 
         # Inject required environment variable
         cls.patcher_env = patch.dict("os.environ", {"AAC_PASS": "dummy_pass"})
@@ -63,6 +64,7 @@ class TestProjectTwoDashboard(unittest.TestCase):
         # Import after patching
         import ProjectTwoDashboardApp as app_module
         cls.app_module = app_module
+        cls.load_calls = list(cls.mock_crud_instance.stream.call_args_list)
 
     @classmethod
     def tearDownClass(cls):
@@ -70,16 +72,19 @@ class TestProjectTwoDashboard(unittest.TestCase):
         cls.patcher_crud.stop()
         cls.patcher_logo.stop()
 
-    # DataFrame setup tests
-    def test_dataframe_loads(self):
-        self.assertIsInstance(self.app_module.df, pd.DataFrame)
+    # Record store setup tests
+    def test_records_load(self):
+        self.assertEqual(len(self.app_module.records), 1)
+
+    def test_records_streamed_past_stale_cache(self):
+        self.assertEqual(self.load_calls[0].args, ({},))
 
     def test_id_column_removed(self):
-        self.assertNotIn("_id", self.app_module.df.columns)
+        self.assertNotIn("_id", self.app_module.table_columns)
 
-    def test_dataframe_column_count(self):
+    def test_table_column_count(self):
         # 16 original - 1 (_id) = 15
-        self.assertEqual(len(self.app_module.df.columns), 15)
+        self.assertEqual(len(self.app_module.table_columns), 15)
 
     # Query builder tests
     def test_build_query_water_rescue(self):
@@ -117,17 +122,191 @@ class TestProjectTwoDashboard(unittest.TestCase):
         self.assertEqual(query, {})
 
     # Callback tests
-    def test_update_dashboard_calls_crud_read(self):
-        self.mock_crud_instance.read.reset_mock()
+    def test_update_dashboard_calls_crud_stream(self):
+        self.mock_crud_instance.stream.reset_mock()
         result = self.app_module.update_dashboard('water')
-        self.mock_crud_instance.read.assert_called_once()
+        self.mock_crud_instance.stream.assert_called_once()
         self.assertIsInstance(result, list)
 
+    def test_update_dashboard_reads_current_documents(self):
+        updated = dict(self.sample_record, name="Buddy Jr")
+        self.mock_crud_instance.stream.return_value = [updated]
+        try:
+            result = self.app_module.update_dashboard('reset')
+        finally:
+            self.mock_crud_instance.stream.return_value = [self.sample_record.copy()]
+        self.mock_crud_instance.stream.assert_called_with({})
+        self.assertEqual(result[0]["name"], "Buddy Jr")
+
     def test_update_dashboard_reset(self):
         result = self.app_module.update_dashboard('reset')
         self.assertIsInstance(result, list)
         self.assertGreater(len(result), 0)
 
+    def test_update_dashboard_keeps_row_id(self):
+        result = self.app_module.update_dashboard('reset')
+        self.assertNotIn("_id", result[0])
+        self.assertEqual(result[0]["id"], "abc123")
+
+    def test_update_dashboard_keeps_table_on_error(self):
+        from dash import no_update
+        from CRUD_Python_Module import CRUDError
+
+        self.mock_crud_instance.stream.side_effect = CRUDError("stream", "down", retryable=True)
+        try:
+            result = self.app_module.update_dashboard('water')
+        finally:
+            self.mock_crud_instance.stream.side_effect = None
+        self.assertIs(result, no_update)
+
+    # Export tests
+    def test_export_links_follow_filter(self):
+        links = self.app_module.update_export_links('water')
+        hrefs = [link.href for link in links[1:]]
+        self.assertIn('/export/water.csv', hrefs)
+        self.assertIn('/export/water.parquet', hrefs)
+
+    def test_export_route_registered(self):
+        rules = [rule.rule for rule in self.app_module.app.server.url_map.iter_rules()]
+        self.assertIn('/export/<profile>.<export_format>', rules)
+
+    # Serialization tests
+    def test_to_table_row_serializes_objectid_numpy_datetime(self):
+        from bson.objectid import ObjectId
+        from dash._utils import to_json
+        import numpy as np
+        import json
+        import plotly.io as pio
+
+        # CI installs orjson, so the fast path is the one under test
+        self.assertEqual(pio.json.config.default_engine, "orjson")
+
+        object_id = ObjectId()
+        rows = [self.app_module.to_table_row({
+            "_id": object_id,
+            "name": "Buddy",
+            "age_upon_outcome_in_weeks": np.float64(104.0),
+            "datetime": pd.Timestamp("2026-01-15 10:00:00"),
+        })]
+        payload = json.loads(to_json(rows))
+
+        self.assertEqual(payload[0]["id"], str(object_id))
+        self.assertEqual(payload[0]["age_upon_outcome_in_weeks"], 104.0)
+        self.assertTrue(payload[0]["datetime"].startswith("2026-01-15"))
+
+    # Search tests
+    def test_search_index_built_from_documents(self):
+        self.assertEqual(len(self.app_module.search_index), 1)
+
+    def test_update_search_matches_typo(self):
+        result = self.app_module.update_search("budy", "reset")
+        self.assertEqual([row["id"] for row in result], ["abc123"])
+        self.assertNotIn("_id", result[0])
+
+    def test_update_search_respects_rescue_filter(self):
+        # Sample record is a Labrador, not a mountain rescue breed
+        self.assertEqual(self.app_module.update_search("labrador", "mountain"), [])
+        self.assertEqual(len(self.app_module.update_search("labrador", "water")), 1)
+
+    def test_filter_change_keeps_search(self):
+        # The rescue type changes while "budy" is still in the search box
+        self.mock_crud_instance.stream.reset_mock()
+        result = self.app_module.update_dashboard("mountain", "budy")
+        self.assertEqual(result, [])
+        result = self.app_module.update_dashboard("water", "budy")
+        self.assertEqual([row["id"] for row in result], ["abc123"])
+        self.mock_crud_instance.stream.assert_not_called()
+
+    def test_table_changes_respect_search(self):
+        query = self.app_module.build_rescue_query('reset')
+        events = [
+            {"op": "insert", "id": "b", "document": {"_id": "b", "name": "Rex", "breed": "Poodle"}},
+            {"op": "insert", "id": "c", "document": {"_id": "c", "name": "Buddy", "breed": "Poodle"}},
+        ]
+
+        changes = self.app_module.table_changes(events, query, "buddy")
+
+        self.assertEqual([(change["id"], change["row"] is not None) for change in changes], [("b", False), ("c", True)])
+
+    def test_update_search_empty_shows_filter(self):
+        result = self.app_module.update_search("", "reset")
+        self.assertEqual(result[0]["id"], "abc123")
+
+    # Live update tests
+    def test_table_changes_send_changed_rows(self):
+        query = self.app_module.build_rescue_query('water')
+        match = {
+            "_id": "c",
+            "animal_type": "Dog",
+            "breed": "Newfoundland",
+            "sex_upon_outcome": "Intact Female",
+            "age_upon_outcome_in_weeks": 52.0,
+            "name": "Bear",
+        }
+        no_match = dict(match, _id="b", breed="Poodle")
+        events = [
+            {"op": "delete", "id": "a", "document": None},
+            {"op": "update", "id": "b", "document": no_match},
+            {"op": "insert", "id": "c", "document": match},
+        ]
+
+        changes = self.app_module.table_changes(events, query)
+
+        self.assertEqual([change["id"] for change in changes], ["a", "b", "c"])
+        self.assertIsNone(changes[0]["row"])
+        self.assertIsNone(changes[1]["row"])
+        self.assertEqual(changes[2]["row"]["id"], "c")
+        self.assertNotIn("_id", changes[2]["row"])
+
+    def test_server_callbacks_do_not_take_table_data(self):
+        for callback in self.app_module.app.callback_map.values():
+            if "callback" not in callback:
+                continue  # clientside
+            self.assertNotIn(("datatable-id", "data"), [
+                (state["id"], state["property"]) for state in callback["state"]
+            ])
+
+    def test_changes_merged_in_browser(self):
+        merge = next(
+            callback for callback in self.app_module.app._callback_list
+            if callback["clientside_function"] and callback["inputs"] == [{"id": "table-changes", "property": "data"}]
+        )
+        self.assertTrue(merge["output"].startswith("datatable-id.data"))
+        self.assertEqual(merge["state"], [{"id": "datatable-id", "property": "data"}])
+
+    def test_apply_changes_no_events(self):
+        from dash import no_update
+        watcher = self.app_module.watcher
+        with patch.object(watcher, "start"), \
+                patch.object(watcher, "changes_since", return_value=("p1", [])):
+            result = self.app_module.apply_changes(1, None, 'reset')
+        self.assertEqual(result, (no_update, no_update, "p1"))
+
+    def test_apply_changes_sends_changed_rows_only(self):
+        from dash import no_update
+        watcher = self.app_module.watcher
+        events = [{"op": "delete", "id": "abc123", "document": None}]
+
+        with patch.object(watcher, "start"), \
+                patch.object(watcher, "changes_since", return_value=("p3", events)):
+            data, changes, position = self.app_module.apply_changes(1, "p2", 'reset', "buddy")
+
+        self.assertIs(data, no_update)
+        self.assertEqual(changes, {"changes": [{"id": "abc123", "row": None}], "limit": self.app_module.SEARCH_LIMIT})
+        self.assertEqual(position, "p3")
+
+    def test_apply_changes_reloads_when_behind(self):
+        from dash import no_update
+        watcher = self.app_module.watcher
+        self.mock_crud_instance.stream.reset_mock()
+        with patch.object(watcher, "start"), \
+                patch.object(watcher, "changes_since", return_value=("p2", None)):
+            data, changes, position = self.app_module.apply_changes(1, "p0", 'reset')
+        self.mock_crud_instance.stream.assert_called_once()
+        self.assertEqual(position, "p2")
+        self.assertEqual(data[0]["id"], "abc123")
+        self.assertIs(changes, no_update)
+
     def test_update_graphs_with_data(self):
         from dash import dcc
 
@@ -0,0 +1,123 @@
+"""
+Test script for ProjectTwoDashboardServer.py
+
+Maintainer: Kyle Gortych
+Date: 02/22/2026
+"""
+
+import unittest
+from unittest.mock import patch, MagicMock
+import sys
+
+
+class TestProjectTwoDashboardServer(unittest.TestCase):
+    """Tests for the production server entry point."""
+
+    @classmethod
+    def setUpClass(cls):
+        """Mock environment and CRUD before importing the server."""
+
+        # Ensure clean import each time
+        sys.modules.pop("ProjectTwoDashboardApp", None)
+        sys.modules.pop("ProjectTwoDashboardServer", None)
+
+        cls.mock_crud_instance = MagicMock()
+        cls.mock_crud_instance.stream.return_value = [
+            {"_id": "abc123", "name": "Buddy", "breed": "Newfoundland"}
+        ]
+
+        cls.patcher_env = patch.dict("os.environ", {
+            "AAC_PASS": "dummy_pass",
+            "DASH_WORKERS": "3",
+            "DASH_THREADS": "8",
+        })
+        cls.patcher_crud = patch(
+            "CRUD_Python_Module.CRUD",
+            return_value=cls.mock_crud_instance
+        )
+        cls.patcher_logo = patch("os.path.exists", return_value=False)
+
+        cls.patcher_env.start()
+        cls.patcher_crud.start()
+        cls.patcher_logo.start()
+
+        import ProjectTwoDashboardServer as server_module
+        cls.server_module = server_module
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server_module.records.unlink()
+        cls.patcher_env.stop()
+        cls.patcher_crud.stop()
+        cls.patcher_logo.stop()
+        sys.modules.pop("ProjectTwoDashboardApp", None)
+        sys.modules.pop("ProjectTwoDashboardServer", None)
+
+    def test_server_is_flask_app(self):
+        self.assertIs(self.server_module.server, self.server_module.app.server)
+
+    def test_worker_and_thread_counts_from_env(self):
+        options = self.server_module.gunicorn_options()
+        self.assertEqual(options["workers"], 3)
+        self.assertEqual(options["threads"], 8)
+        self.assertEqual(options["worker_class"], "gthread")
+
+    def test_preload_enabled(self):
+        self.assertTrue(self.server_module.gunicorn_options()["preload_app"])
+
+    def test_post_fork_reconnects_mongo(self):
+        self.mock_crud_instance.reconnect.reset_mock()
+        with patch.object(self.server_module.watcher, "start") as mock_start:
+            self.server_module.post_fork(MagicMock(), MagicMock())
+        self.mock_crud_instance.reconnect.assert_called_once()
+        mock_start.assert_called_once()
+
+    def test_records_in_shared_memory(self):
+        from Record_Store_Module import RecordStore
+
+        records = self.server_module.records
+        self.assertIsNotNone(records.segment)
+        self.assertIn("on_exit", self.server_module.gunicorn_options())
+
+        # Another process maps the same segment by name
+        attached = RecordStore.attach(records.segment.name)
+        try:
+            self.assertEqual(attached[0]["name"], "Buddy")
+        finally:
+            attached.close()
+
+    def test_import_objects_frozen_before_fork(self):
+        import gc
+        self.assertGreater(gc.get_freeze_count(), 0)
+
+    def test_static_assets_cached(self):
+        config = self.server_module.server.config
+        self.assertEqual(
+            config["SEND_FILE_MAX_AGE_DEFAULT"],
+            self.server_module.STATIC_MAX_AGE
+        )
+
+    def test_compression_negotiated(self):
+        try:
+            import flask_compress  # noqa: F401
+        except ImportError:
+            self.skipTest("flask-compress not installed")
+
+        client = self.server_module.server.test_client()
+        compressed = client.get(
+            "/_dash-layout", headers={"Accept-Encoding": "gzip"}
+        )
+        plain = client.get("/_dash-layout", headers={"Accept-Encoding": ""})
+
+        self.assertEqual(compressed.headers.get("Content-Encoding"), "gzip")
+        self.assertIsNone(plain.headers.get("Content-Encoding"))
+
+    def test_configure_server_is_idempotent(self):
+        flask_server = self.server_module.server
+        hooks = list(flask_server.after_request_funcs.get(None, []))
+        self.server_module.configure_server(self.server_module.app)
+        self.assertEqual(flask_server.after_request_funcs.get(None, []), hooks)
+
+
+if __name__ == "__main__":
+    unittest.main()
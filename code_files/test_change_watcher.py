@@ -0,0 +1,204 @@
+"""
+Test script for Change_Watcher_Module.py
+
+Maintainer: Kyle Gortych
+Date: 02/22/2026
+"""
+
+import unittest
+from unittest.mock import patch, MagicMock
+
+from bson.objectid import ObjectId
+from bson.timestamp import Timestamp
+from pymongo.errors import OperationFailure
+
+from Change_Watcher_Module import (
+    ChangeWatcher,
+    CHANGE_STREAM_UNSUPPORTED,
+    matches_query,
+    timestamp_position,
+)
+
+
+class TestMatchesQuery(unittest.TestCase):
+
+    def setUp(self):
+        self.document = {
+            "animal_type": "Dog",
+            "breed": "Newfoundland",
+            "sex_upon_outcome": "Intact Female",
+            "age_upon_outcome_in_weeks": 52.0,
+        }
+
+    def test_rescue_query_matches(self):
+        query = {
+            "animal_type": "Dog",
+            "breed": {"$in": ["Labrador Retriever Mix", "Newfoundland"]},
+            "age_upon_outcome_in_weeks": {"$gte": 26, "$lte": 156},
+        }
+        self.assertTrue(matches_query(self.document, query))
+
+    def test_range_excludes(self):
+        query = {"age_upon_outcome_in_weeks": {"$gte": 100}}
+        self.assertFalse(matches_query(self.document, query))
+
+    def test_missing_field_excluded_from_range(self):
+        self.assertFalse(matches_query({}, {"age_upon_outcome_in_weeks": {"$gte": 1}}))
+
+    def test_empty_query_matches_all(self):
+        self.assertTrue(matches_query(self.document, {}))
+
+    def test_unsupported_operator(self):
+        with self.assertRaises(ValueError):
+            matches_query(self.document, {"name": {"$regex": "^B"}})
+
+
+class TestChangeWatcher(unittest.TestCase):
+
+    def setUp(self):
+        self.watcher = ChangeWatcher(MagicMock(), max_events=3)
+
+    def test_not_ready_returns_no_events(self):
+        self.assertEqual(self.watcher.changes_since(None), (None, []))
+
+    def test_new_client_gets_latest_position(self):
+        self.watcher.horizon = "a"
+        self.watcher.record("insert", ObjectId(), "b", {"name": "Buddy"})
+        self.assertEqual(self.watcher.changes_since(None), ("b", []))
+
+    def test_events_after_position(self):
+        self.watcher.horizon = "a"
+        first, second = ObjectId(), ObjectId()
+        self.watcher.record("insert", first, "b", {"name": "Buddy"})
+        self.watcher.record("delete", second, "c")
+
+        latest, events = self.watcher.changes_since("b")
+        self.assertEqual(latest, "c")
+        self.assertEqual([event["id"] for event in events], [str(second)])
+
+    def test_position_ahead_of_worker_is_kept(self):
+        self.watcher.horizon = "a"
+        self.assertEqual(self.watcher.changes_since("z"), ("z", []))
+
+    def test_dropped_history_requires_reload(self):
+        self.watcher.horizon = "a"
+        for position in ["b", "c", "d", "e"]:
+            self.watcher.record("insert", ObjectId(), position, {})
+
+        self.assertEqual(self.watcher.horizon, "b")
+        latest, events = self.watcher.changes_since("a")
+        self.assertEqual(latest, "e")
+        self.assertIsNone(events)
+
+    def test_record_change_stream_events(self):
+        object_id = ObjectId()
+        cluster_time = Timestamp(1700000000, 1)
+
+        self.watcher._record_change({
+            "operationType": "update",
+            "clusterTime": cluster_time,
+            "documentKey": {"_id": object_id},
+            "fullDocument": {"_id": object_id, "name": "Buddy"},
+        })
+        self.watcher._record_change({
+            "operationType": "delete",
+            "clusterTime": Timestamp(1700000000, 2),
+            "documentKey": {"_id": object_id},
+        })
+
+        update, delete = self.watcher.events
+        self.assertEqual(update["op"], "update")
+        self.assertEqual(update["position"], timestamp_position(cluster_time))
+        self.assertEqual(delete["op"], "delete")
+        self.assertIsNone(delete["document"])
+        self.assertLess(update["position"], delete["position"])
+
+    def test_standalone_server_falls_back_to_polling(self):
+        self.watcher.crud.collection.database.command.return_value = {"ok": 1}
+
+        with self.assertRaises(OperationFailure) as context:
+            self.watcher._watch_change_stream()
+        self.assertEqual(context.exception.code, CHANGE_STREAM_UNSUPPORTED)
+
+    def test_only_unsupported_servers_are_polled(self):
+        self.watcher.poll_interval = 0
+        failures = [OperationFailure("history lost", 286), OperationFailure("not authorized", 13)]
+
+        def watch():
+            if failures:
+                raise failures.pop(0)
+
+        with patch.object(self.watcher, "_watch_change_stream", side_effect=watch) as stream, \
+                patch.object(self.watcher, "_poll") as poll:
+            self.watcher._run()
+        self.assertEqual(stream.call_count, 3)
+        poll.assert_not_called()
+
+        with patch.object(self.watcher, "_watch_change_stream",
+                          side_effect=OperationFailure("standalone", CHANGE_STREAM_UNSUPPORTED)), \
+                patch.object(self.watcher, "_poll") as poll:
+            self.watcher._run()
+        poll.assert_called_once()
+
+    def test_restarted_stream_drops_older_history(self):
+        old = timestamp_position(Timestamp(1600000000, 1))
+        self.watcher.horizon = old
+        self.watcher.record("insert", ObjectId(), old, {})
+        self.watcher.crud.collection.database.command.return_value = {"operationTime": Timestamp(1700000000, 1)}
+        self.watcher.crud.collection.watch.side_effect = OperationFailure("history lost", 286)
+
+        with self.assertRaises(OperationFailure):
+            self.watcher._watch_change_stream()
+        self.assertEqual(self.watcher.horizon, timestamp_position(Timestamp(1700000000, 1)))
+        self.assertEqual(len(self.watcher.events), 0)
+        self.assertIsNone(self.watcher.changes_since(old)[1])
+
+    def test_observer_failure_keeps_event(self):
+        observer = MagicMock()
+        observer.documents_changed.side_effect = ValueError("bad document")
+        self.watcher.add_observer(observer)
+
+        self.watcher.record("insert", ObjectId(), "b", {"name": "Buddy"})
+        self.assertEqual(len(self.watcher.events), 1)
+
+    def test_poll_sees_documents_sharing_the_last_time(self):
+        collection = MagicMock()
+        first, second = ObjectId(), ObjectId()
+        collection.find.return_value.sort.return_value = [
+            {"_id": first, "datetime": "2026-01-15 10:00:00"},
+            {"_id": second, "datetime": "2026-01-15 10:00:00"},
+        ]
+
+        last_value, seen_ids = self.watcher._poll_changes(collection, "2026-01-15 10:00:00", {first})
+
+        collection.find.assert_called_with({"datetime": {"$gte": "2026-01-15 10:00:00"}})
+        self.assertEqual([event["id"] for event in self.watcher.events], [str(second)])
+        self.assertEqual(seen_ids, {first, second})
+        self.assertEqual(last_value, "2026-01-15 10:00:00")
+
+    def test_poll_creates_time_index(self):
+        self.watcher._stop.set()
+        self.watcher._poll()
+        self.watcher.crud.collection.create_index.assert_called_once_with("datetime")
+
+    def test_poll_positions_unique_within_a_time(self):
+        self.watcher.horizon = "2026-01-15 10:00:00"
+        collection = MagicMock()
+        first, second = ObjectId(), ObjectId()
+        collection.find.return_value.sort.return_value = [{"_id": first, "datetime": "2026-01-15 10:01:00"}]
+        last_value, seen_ids = self.watcher._poll_changes(collection, "2026-01-15 10:00:00", set())
+        position, events = self.watcher.changes_since(None)
+
+        # Inserted later in the same minute
+        collection.find.return_value.sort.return_value = [
+            {"_id": first, "datetime": "2026-01-15 10:01:00"},
+            {"_id": second, "datetime": "2026-01-15 10:01:00"},
+        ]
+        self.watcher._poll_changes(collection, last_value, seen_ids)
+
+        latest, events = self.watcher.changes_since(position)
+        self.assertEqual([event["id"] for event in events], [str(second)])
+
+
+if __name__ == "__main__":
+    unittest.main()
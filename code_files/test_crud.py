@@ -6,10 +6,14 @@ Maintainer: Kyle Gortych
 Date: 02/15/2026
 """
 
+import os
 import unittest
 from unittest.mock import patch, MagicMock
 
-from CRUD_Python_Module import CRUD
+from bson.errors import InvalidDocument
+from pymongo.errors import AutoReconnect, OperationFailure, ServerSelectionTimeoutError
+
+from CRUD_Python_Module import CRUD, CRUDError, CircuitBreaker, CircuitOpenError
 from ModuleFiveAssignmentApp import app  # Dash app
 
 # Module Tests CRUD
@@ -47,6 +51,419 @@ class TestCRUD(unittest.TestCase):
         deleted_count = crud.delete({"name": "Luna"})
         self.assertEqual(deleted_count, 1)
 
+    @patch("CRUD_Python_Module.MongoClient")
+    def test_reconnect_creates_new_client(self, mock_mongo):
+        crud = CRUD(username="user", password="pass")
+        first_client = crud.client
+
+        mock_mongo.return_value = MagicMock()
+        crud.reconnect()
+
+        self.assertEqual(mock_mongo.call_count, 2)
+        self.assertIsNot(crud.client, first_client)
+        mock_mongo.assert_called_with(crud.uri, **crud.client_options)
+
+    @patch("CRUD_Python_Module.MongoClient")
+    def test_replica_set_options(self, mock_mongo):
+        crud = CRUD(
+            username="user",
+            password="pass",
+            host="mongo1,mongo2:27018",
+            replica_set="rs0",
+            read_preference="secondaryPreferred",
+            read_concern="majority",
+            write_concern={"w": "majority", "wtimeout": 500},
+            compressors=["zstd", "snappy", "zlib"],
+            server_selection_timeout_ms=2000,
+            socket_timeout_ms=10000,
+        )
+
+        self.assertIn("@mongo1:27017,mongo2:27018/aac", crud.uri)
+
+        options = mock_mongo.call_args.kwargs
+        self.assertEqual(options["replicaSet"], "rs0")
+        self.assertEqual(options["read_preference"].mongos_mode, "secondaryPreferred")
+        self.assertEqual(options["readConcernLevel"], "majority")
+        self.assertEqual(options["w"], "majority")
+        self.assertEqual(options["wTimeoutMS"], 500)
+        self.assertEqual(options["compressors"], "zstd,snappy,zlib")
+        self.assertEqual(options["serverSelectionTimeoutMS"], 2000)
+        self.assertEqual(options["socketTimeoutMS"], 10000)
+        self.assertNotIn("connectTimeoutMS", options)
+
+    @patch("CRUD_Python_Module.MongoClient")
+    def test_per_operation_options(self, mock_mongo):
+        mock_collection = MagicMock()
+        mock_mongo.return_value.__getitem__.return_value.__getitem__.return_value = mock_collection
+        crud = CRUD(username="user", password="pass")
+
+        crud.read({}, read_preference="secondary", read_concern="local")
+        options = mock_collection.with_options.call_args.kwargs
+        self.assertEqual(options["read_preference"].mongos_mode, "secondary")
+        self.assertEqual(options["read_concern"].level, "local")
+
+        crud.delete({"name": "Luna"}, write_concern="majority")
+        options = mock_collection.with_options.call_args.kwargs
+        self.assertEqual(options["write_concern"].document, {"w": "majority"})
+
+        # No options uses the default collection
+        mock_collection.with_options.reset_mock()
+        crud.read({})
+        mock_collection.with_options.assert_not_called()
+
+    def test_unknown_read_preference(self):
+        with self.assertRaises(ValueError):
+            CRUD(username="user", password="pass", read_preference="fastest")
+
+    @patch("CRUD_Python_Module.MongoClient")
+    def test_observers_notified_of_writes(self, mock_mongo):
+        mock_collection = MagicMock()
+        mock_mongo.return_value.__getitem__.return_value.__getitem__.return_value = mock_collection
+        crud = CRUD(username="user", password="pass")
+        observer = MagicMock(spec=["documents_changed"])
+        crud.add_observer(observer)
+
+        crud.create({"name": "Luna"})
+        observer.documents_changed.assert_called_with([], [{"name": "Luna"}])
+
+        before = [{"_id": 1, "name": "Luna", "age": 5}]
+        after = [{"_id": 1, "name": "Luna", "age": 6}]
+        mock_collection.find.side_effect = [before, after]
+        crud.update({"name": "Luna"}, {"$set": {"age": 6}})
+        observer.documents_changed.assert_called_with(before, after)
+        mock_collection.find.assert_called_with({"_id": {"$in": [1]}}, None)
+
+        mock_collection.find.side_effect = [after]
+        crud.delete({"name": "Luna"})
+        observer.documents_changed.assert_called_with(after, [])
+
+    @patch("CRUD_Python_Module.MongoClient")
+    def test_snapshot_reads_observed_fields_only(self, mock_mongo):
+        mock_collection = MagicMock()
+        mock_mongo.return_value.__getitem__.return_value.__getitem__.return_value = mock_collection
+        crud = CRUD(username="user", password="pass")
+        observer = MagicMock(spec=["documents_changed", "observed_fields"])
+        observer.observed_fields = ("breed", "outcome_type")
+        crud.add_observer(observer)
+
+        mock_collection.find.side_effect = [[{"_id": 1, "breed": "Poodle"}]]
+        crud.delete({"name": "Luna"})
+
+        mock_collection.find.assert_called_once_with({"name": "Luna"}, {"breed": 1, "outcome_type": 1})
+
+    @patch("CRUD_Python_Module.MongoClient")
+    def test_observer_failure_does_not_fail_write(self, mock_mongo):
+        mock_collection = MagicMock()
+        mock_mongo.return_value.__getitem__.return_value.__getitem__.return_value = mock_collection
+        crud = CRUD(username="user", password="pass")
+        failing = MagicMock(spec=["documents_changed"])
+        failing.documents_changed.side_effect = CRUDError("rollup", "down")
+        observer = MagicMock(spec=["documents_changed"])
+        crud.add_observer(failing)
+        crud.add_observer(observer)
+
+        self.assertTrue(crud.create({"name": "Luna"}))
+        mock_collection.insert_one.assert_called_once()
+        observer.documents_changed.assert_called_once_with([], [{"name": "Luna"}])
+
+    @patch("CRUD_Python_Module.MongoClient")
+    def test_text_search(self, mock_mongo):
+        mock_collection = MagicMock()
+        mock_mongo.return_value.__getitem__.return_value.__getitem__.return_value = mock_collection
+        cursor = mock_collection.find.return_value.sort.return_value.limit
+        cursor.return_value = [{"name": "Luna", "score": 1.5}]
+        crud = CRUD(username="user", password="pass")
+
+        crud.create_text_index()
+        mock_collection.create_index.assert_called_with(
+            [("name", "text"), ("breed", "text"), ("color", "text")], name="search_text"
+        )
+
+        result = crud.search("luna", limit=5, query={"animal_type": "Dog"})
+        self.assertEqual(result, [{"name": "Luna", "score": 1.5}])
+        search_query, projection = mock_collection.find.call_args.args
+        self.assertEqual(search_query, {"$and": [{"animal_type": "Dog"}, {"$text": {"$search": "luna"}}]})
+        self.assertEqual(projection, {"score": {"$meta": "textScore"}})
+        cursor.assert_called_with(5)
+
+    @patch("CRUD_Python_Module.MongoClient")
+    def test_stream_uses_cursor(self, mock_mongo):
+        mock_collection = MagicMock()
+        mock_mongo.return_value.__getitem__.return_value.__getitem__.return_value = mock_collection
+        cursor = mock_collection.find.return_value.sort.return_value.batch_size.return_value
+        cursor.__iter__.return_value = iter([{"name": "Luna"}, {"name": "Max"}])
+        crud = CRUD(username="user", password="pass")
+
+        documents = crud.stream({"animal_type": "Dog"}, projection={"_id": 0}, batch_size=50)
+
+        self.assertEqual(list(documents), [{"name": "Luna"}, {"name": "Max"}])
+        mock_collection.find.assert_called_with({"animal_type": "Dog"}, {"_id": 0})
+        mock_collection.find.return_value.sort.return_value.batch_size.assert_called_with(50)
+        cursor.close.assert_called_once()
+
+# Resilience Tests CRUD
+@patch("CRUD_Python_Module.time.sleep")
+@patch("CRUD_Python_Module.MongoClient")
+class TestCRUDResilience(unittest.TestCase):
+
+    def make_crud(self, mock_mongo, **kwargs):
+        self.collection = MagicMock()
+        mock_mongo.return_value.__getitem__.return_value.__getitem__.return_value = self.collection
+        return CRUD(username="user", password="pass", **kwargs)
+
+    def test_read_retries_transient_errors(self, mock_mongo, mock_sleep):
+        crud = self.make_crud(mock_mongo, retries=3)
+        self.collection.find.side_effect = [AutoReconnect("election"), AutoReconnect("election"), [{"name": "Luna"}]]
+
+        self.assertEqual(crud.read({}), [{"name": "Luna"}])
+        self.assertEqual(self.collection.find.call_count, 3)
+        self.assertEqual(mock_sleep.call_count, 2)
+
+    def test_backoff_is_bounded(self, mock_mongo, mock_sleep):
+        crud = self.make_crud(mock_mongo, backoff_base=0.1, backoff_max=1.0)
+        for attempt in range(10):
+            self.assertLessEqual(crud._backoff(attempt), 1.0)
+            self.assertGreaterEqual(crud._backoff(attempt), 0)
+
+    def test_read_raises_after_retries(self, mock_mongo, mock_sleep):
+        crud = self.make_crud(mock_mongo, retries=2)
+        self.collection.find.side_effect = AutoReconnect("down")
+
+        with self.assertRaises(CRUDError) as context:
+            crud.read({})
+        self.assertEqual(context.exception.operation, "read")
+        self.assertEqual(context.exception.attempts, 3)
+        self.assertTrue(context.exception.retryable)
+
+    def test_server_selection_timeout_not_retried(self, mock_mongo, mock_sleep):
+        crud = self.make_crud(mock_mongo, retries=3)
+        self.collection.find.side_effect = ServerSelectionTimeoutError("no primary")
+
+        with self.assertRaises(CRUDError) as context:
+            crud.read({})
+        self.assertEqual(self.collection.find.call_count, 1)
+        self.assertTrue(context.exception.retryable)
+        mock_sleep.assert_not_called()
+
+    def test_every_failed_attempt_counts_for_breaker(self, mock_mongo, mock_sleep):
+        crud = self.make_crud(mock_mongo, retries=3, breaker_threshold=2)
+        self.collection.find.side_effect = AutoReconnect("down")
+
+        with self.assertRaises(CRUDError) as context:
+            crud.read({})
+
+        # Retries stop once the circuit opens
+        self.assertEqual(context.exception.attempts, 2)
+        self.assertEqual(crud.breaker.state, "open")
+
+    def test_client_side_error_releases_half_open_trial(self, mock_mongo, mock_sleep):
+        crud = self.make_crud(mock_mongo, breaker_threshold=1, breaker_reset=0)
+        crud.breaker.record_failure()
+        self.assertEqual(crud.breaker.state, "half_open")
+        self.collection.find.side_effect = [InvalidDocument("cannot encode object"), [{"name": "Luna"}]]
+
+        with self.assertRaises(InvalidDocument):
+            crud.read({"name": "Luna"})
+        self.assertEqual(crud.read({}), [{"name": "Luna"}])
+        self.assertEqual(crud.breaker.state, "closed")
+
+    def test_stream_retries_first_batch(self, mock_mongo, mock_sleep):
+        crud = self.make_crud(mock_mongo, retries=3)
+
+        def election():
+            raise AutoReconnect("election")
+            yield
+
+        cursor = self.collection.find.return_value.sort.return_value.batch_size.return_value
+        cursor.__iter__.side_effect = [election(), iter([{"name": "Luna"}])]
+
+        documents = crud.stream({})
+        self.assertEqual(self.collection.find.call_count, 2)
+        self.assertEqual(list(documents), [{"name": "Luna"}])
+
+    def test_stream_rejects_bad_query_eagerly(self, mock_mongo, mock_sleep):
+        crud = self.make_crud(mock_mongo)
+        with self.assertRaises(ValueError):
+            crud.stream("not a query")
+
+    def test_write_not_retried_on_network_error(self, mock_mongo, mock_sleep):
+        crud = self.make_crud(mock_mongo)
+        self.collection.update_many.side_effect = AutoReconnect("reset")
+
+        with self.assertRaises(CRUDError):
+            crud.update({"name": "Luna"}, {"$inc": {"age": 1}})
+        self.assertEqual(self.collection.update_many.call_count, 1)
+        mock_sleep.assert_not_called()
+
+    def test_non_retryable_error(self, mock_mongo, mock_sleep):
+        crud = self.make_crud(mock_mongo)
+        self.collection.insert_one.side_effect = OperationFailure("bad document", 2)
+
+        with self.assertRaises(CRUDError) as context:
+            crud.create({"name": "Luna"})
+        self.assertFalse(context.exception.retryable)
+        self.assertEqual(crud.breaker.state, "closed")
+
+    def test_circuit_opens_and_fails_fast(self, mock_mongo, mock_sleep):
+        crud = self.make_crud(mock_mongo, retries=0, breaker_threshold=2)
+        self.collection.find.side_effect = AutoReconnect("down")
+
+        for _ in range(2):
+            with self.assertRaises(CRUDError):
+                crud.read({})
+        self.assertEqual(crud.breaker.state, "open")
+
+        with self.assertRaises(CircuitOpenError):
+            crud.read({})
+        self.assertEqual(self.collection.find.call_count, 2)
+
+    def test_stale_result_served_while_failing(self, mock_mongo, mock_sleep):
+        crud = self.make_crud(mock_mongo, retries=0, serve_stale=True)
+        self.collection.find.side_effect = [[{"name": "Luna"}], AutoReconnect("down")]
+
+        self.assertEqual(crud.read({"name": "Luna"}), [{"name": "Luna"}])
+        self.assertEqual(crud.read({"name": "Luna"}), [{"name": "Luna"}])
+
+        # Nothing cached for a different query
+        self.collection.find.side_effect = AutoReconnect("down")
+        with self.assertRaises(CRUDError):
+            crud.read({"name": "Max"})
+
+
+# Batched Update/Delete Tests CRUD
+@patch("CRUD_Python_Module.time.sleep")
+@patch("CRUD_Python_Module.MongoClient")
+class TestCRUDBatched(unittest.TestCase):
+
+    def make_crud(self, mock_mongo, batches):
+        self.collection = MagicMock()
+        mock_mongo.return_value.__getitem__.return_value.__getitem__.return_value = self.collection
+        self.collection.find.return_value.sort.return_value.limit.side_effect = batches
+        return CRUD(username="user", password="pass")
+
+    def test_update_walks_id_ranges(self, mock_mongo, mock_sleep):
+        crud = self.make_crud(mock_mongo, [[{"_id": 1}, {"_id": 2}], [{"_id": 3}], []])
+        self.collection.update_many.return_value.modified_count = 1
+        query = {"animal_type": "Dog"}
+        reports = []
+
+        result = crud.update_batched(query, {"$set": {"age": 1}}, batch_size=2, progress=reports.append)
+
+        self.assertEqual(result, {"processed": 3, "modified": 2, "batches": 2, "last_id": 3})
+        self.assertEqual([report["last_id"] for report in reports], [2, 3])
+
+        first_target = self.collection.update_many.call_args_list[0].args[0]
+        self.assertEqual(first_target, {"$and": [query, {"_id": {"$in": [1, 2]}}]})
+
+        second_range = self.collection.find.call_args_list[1].args[0]
+        self.assertEqual(second_range, {"$and": [query, {"_id": {"$gt": 2}}]})
+        self.collection.find.return_value.sort.return_value.limit.assert_called_with(2)
+
+    def test_delete_resumes_from_checkpoint(self, mock_mongo, mock_sleep):
+        crud = self.make_crud(mock_mongo, [[{"_id": 8}], []])
+        self.collection.delete_many.return_value.deleted_count = 1
+
+        result = crud.delete_batched({}, resume_after=7)
+
+        self.assertEqual(result["deleted"], 1)
+        self.assertEqual(self.collection.find.call_args_list[0].args[0], {"$and": [{}, {"_id": {"$gt": 7}}]})
+
+    @patch("CRUD_Python_Module.time.monotonic", return_value=0)
+    def test_rate_limit_sleeps(self, mock_time, mock_mongo, mock_sleep):
+        crud = self.make_crud(mock_mongo, [[{"_id": 1}, {"_id": 2}], []])
+        self.collection.delete_many.return_value.deleted_count = 2
+
+        crud.delete_batched({}, max_rate=4)
+
+        mock_sleep.assert_called_once_with(0.5)
+
+    def test_dry_run_counts_without_writing(self, mock_mongo, mock_sleep):
+        crud = self.make_crud(mock_mongo, [])
+        self.collection.count_documents.return_value = 42
+        self.collection.find.return_value.explain.return_value = {"queryPlanner": {"winningPlan": {"stage": "COLLSCAN"}}}
+
+        result = crud.delete_batched({"outcome_type": "Transfer"}, dry_run=True)
+
+        self.assertEqual(result["matched"], 42)
+        self.assertEqual(result["plan"]["winningPlan"]["stage"], "COLLSCAN")
+        self.collection.delete_many.assert_not_called()
+
+    def test_failed_batch_keeps_checkpoint(self, mock_mongo, mock_sleep):
+        crud = self.make_crud(mock_mongo, [[{"_id": 1}], [{"_id": 2}]])
+        self.collection.delete_many.side_effect = [MagicMock(deleted_count=1), AutoReconnect("down")]
+        reports = []
+
+        with self.assertRaises(CRUDError):
+            crud.delete_batched({}, batch_size=1, progress=reports.append)
+        self.assertEqual(reports[-1]["last_id"], 1)
+
+
+class TestCircuitBreaker(unittest.TestCase):
+
+    @patch("CRUD_Python_Module.time.monotonic")
+    def test_half_open_allows_single_trial(self, mock_time):
+        mock_time.return_value = 100
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30)
+        breaker.record_failure()
+        self.assertFalse(breaker.allow())
+
+        mock_time.return_value = 131
+        self.assertEqual(breaker.state, "half_open")
+        self.assertTrue(breaker.allow())
+        self.assertFalse(breaker.allow())
+
+        breaker.record_success()
+        self.assertEqual(breaker.state, "closed")
+
+    @patch("CRUD_Python_Module.time.monotonic")
+    def test_release_frees_trial(self, mock_time):
+        mock_time.return_value = 100
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30)
+        breaker.record_failure()
+
+        mock_time.return_value = 131
+        self.assertTrue(breaker.allow())
+        breaker.release()
+        self.assertEqual(breaker.state, "half_open")
+        self.assertTrue(breaker.allow())
+
+
+# Integration tests against a local multi-node replica set, e.g.
+# AAC_TEST_HOSTS=localhost:27017,localhost:27018,localhost:27019
+# AAC_TEST_REPLICA_SET=rs0 AAC_PASS=... python -m unittest test_crud
+@unittest.skipUnless(
+    os.getenv("AAC_TEST_HOSTS") and os.getenv("AAC_TEST_REPLICA_SET") and os.getenv("AAC_PASS"),
+    "local replica set not configured"
+)
+class TestCRUDReplicaSet(unittest.TestCase):
+
+    def setUp(self):
+        self.crud = CRUD(
+            username=os.getenv("AAC_USER", "aacuser"),
+            password=os.getenv("AAC_PASS"),
+            db_name="aac_test",
+            collection_name="crud_replica_set",
+            host=os.getenv("AAC_TEST_HOSTS"),
+            replica_set=os.getenv("AAC_TEST_REPLICA_SET"),
+            read_preference="secondaryPreferred",
+            write_concern="majority",
+            compressors=["zstd", "snappy", "zlib"],
+            server_selection_timeout_ms=5000,
+        )
+        self.crud.collection.delete_many({})
+
+    def tearDown(self):
+        self.crud.collection.drop()
+        self.crud.client.close()
+
+    def test_majority_write_visible_to_majority_read(self):
+        self.assertTrue(self.crud.create({"name": "Luna", "animal_type": "Cat"}))
+
+        result = self.crud.read({"name": "Luna"}, read_preference="primary", read_concern="majority")
+        self.assertEqual(len(result), 1)
+
+        self.assertEqual(self.crud.delete({"name": "Luna"}, write_concern="majority"), 1)
+
 # Dash App Tests
 class TestDashApp(unittest.TestCase):
 
@@ -58,7 +475,7 @@ class TestDashApp(unittest.TestCase):
         mock_crud_class.return_value = mock_crud
 
         # Use Dash test client
-        test_client = app.test_client()
+        test_client = app.server.test_client()
 
         # Simulate callback input
         # Dash 2.0+ allows callable callbacks directly
@@ -0,0 +1,252 @@
+"""
+Test script for Export_Module.py
+
+Maintainer: Kyle Gortych
+Date: 02/22/2026
+"""
+
+import csv
+import io
+import json
+import os
+import tempfile
+import unittest
+from unittest.mock import patch, MagicMock
+
+from flask import Flask
+
+import Export_Module
+from CRUD_Python_Module import CRUDError
+from Export_Module import (
+    export_stream,
+    export_tasks,
+    register_export_routes,
+    stream_csv,
+    stream_jsonl,
+    stream_parquet,
+)
+
+
+def make_documents(count):
+    return ({"name": f"Dog {i}", "breed": "Newfoundland", "age_upon_outcome_in_weeks": float(i)}
+            for i in range(count))
+
+
+class TestStreamWriters(unittest.TestCase):
+
+    def test_csv_chunks(self):
+        chunks = list(stream_csv(make_documents(5), chunk_rows=2))
+        self.assertEqual(len(chunks), 3)
+
+        rows = list(csv.DictReader(io.StringIO(''.join(chunks))))
+        self.assertEqual(len(rows), 5)
+        self.assertEqual(rows[4]["name"], "Dog 4")
+
+    def test_csv_missing_field_left_empty(self):
+        documents = iter([{"name": "Bear", "breed": "Newfoundland"}, {"name": "Luna"}])
+        rows = list(csv.DictReader(io.StringIO(''.join(stream_csv(documents)))))
+        self.assertEqual(rows[1]["breed"], "")
+
+    def test_csv_header_keeps_fields_missing_from_first_document(self):
+        documents = iter([{"breed": "Newfoundland", "rescue_notes": "calm"}, {"name": "Luna", "location_lat": 30.5}])
+        text = ''.join(stream_csv(documents))
+        reader = csv.DictReader(io.StringIO(text))
+
+        self.assertIn("name", reader.fieldnames)
+        self.assertIn("location_lat", reader.fieldnames)
+        self.assertIn("rescue_notes", reader.fieldnames)
+        rows = list(reader)
+        self.assertEqual(rows[1]["name"], "Luna")
+        self.assertEqual(rows[1]["location_lat"], "30.5")
+
+    def test_jsonl(self):
+        text = ''.join(stream_jsonl(make_documents(3), chunk_rows=2))
+        lines = [json.loads(line) for line in text.splitlines()]
+        self.assertEqual([line["name"] for line in lines], ["Dog 0", "Dog 1", "Dog 2"])
+
+    def test_parquet_row_groups(self):
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            self.skipTest("pyarrow not installed")
+
+        data = b''.join(stream_parquet(make_documents(25), chunk_rows=10))
+        parquet_file = pq.ParquetFile(io.BytesIO(data))
+        self.assertEqual(parquet_file.num_row_groups, 3)
+        self.assertEqual(parquet_file.read().num_rows, 25)
+
+    def test_parquet_schema_independent_of_first_chunk(self):
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            self.skipTest("pyarrow not installed")
+
+        documents = iter([
+            {"name": None, "breed": "Newfoundland"},
+            {"name": 123, "breed": "Newfoundland", "color": "Black",
+             "age_upon_outcome_in_weeks": "52", "location_lat": "unknown"},
+        ])
+        data = b''.join(stream_parquet(documents, chunk_rows=1))
+        table = pq.read_table(io.BytesIO(data))
+
+        self.assertEqual(table.num_rows, 2)
+        self.assertEqual(table.column("name").to_pylist(), [None, "123"])
+        self.assertEqual(table.column("color").to_pylist(), [None, "Black"])
+        self.assertEqual(table.column("age_upon_outcome_in_weeks").to_pylist(), [None, 52.0])
+        self.assertEqual(table.column("location_lat").to_pylist(), [None, None])
+
+    def test_empty_result(self):
+        self.assertEqual(''.join(stream_csv(iter([]))), '')
+        self.assertEqual(list(stream_parquet(iter([]))), [])
+
+    def test_export_stream_reads_cursor_in_batches(self):
+        crud = MagicMock()
+        crud.stream.return_value = make_documents(3)
+
+        text = ''.join(export_stream(crud, {"animal_type": "Dog"}, "csv", chunk_rows=2))
+
+        self.assertIn("Dog 2", text)
+        crud.stream.assert_called_once_with(
+            {"animal_type": "Dog"}, projection={"_id": 0}, batch_size=2,
+            read_preference="secondaryPreferred"
+        )
+
+    def test_unknown_format(self):
+        with self.assertRaises(ValueError):
+            export_stream(MagicMock(), {}, "xlsx")
+
+
+class TestExportRoute(unittest.TestCase):
+
+    def setUp(self):
+        self.crud = MagicMock()
+        self.crud.stream.side_effect = lambda *args, **kwargs: make_documents(3)
+        self.server = Flask(__name__)
+        register_export_routes(self.server, self.crud)
+        self.client = self.server.test_client()
+
+    def test_streams_profile(self):
+        response = self.client.get("/export/water.csv")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.is_streamed)
+        self.assertEqual(response.mimetype, "text/csv")
+        self.assertIn("water.csv", response.headers["Content-Disposition"])
+        self.assertIn("Dog 2", response.get_data(as_text=True))
+
+        query = self.crud.stream.call_args.args[0]
+        self.assertEqual(query["sex_upon_outcome"], "Intact Female")
+
+    def test_unknown_profile_or_format(self):
+        self.assertEqual(self.client.get("/export/desert.csv").status_code, 404)
+        self.assertEqual(self.client.get("/export/water.xlsx").status_code, 404)
+
+    def test_parquet_without_pyarrow_is_501(self):
+        with patch.object(Export_Module, "_require_pyarrow", side_effect=ValueError("no pyarrow")):
+            response = self.client.get("/export/water.parquet")
+        self.assertEqual(response.status_code, 501)
+        self.crud.stream.assert_not_called()
+
+        # The export slot was released
+        self.assertEqual(self.client.get("/export/water.csv").status_code, 200)
+
+    def test_failed_query_is_503(self):
+        self.crud.stream.side_effect = CRUDError("stream", "no primary", retryable=True)
+        self.assertEqual(self.client.get("/export/water.csv").status_code, 503)
+
+        self.crud.stream.side_effect = lambda *args, **kwargs: make_documents(3)
+        self.assertEqual(self.client.get("/export/water.csv").status_code, 200)
+
+    def test_concurrent_exports_limited(self):
+        first = self.client.get("/export/water.csv", buffered=False)
+        self.assertEqual(self.client.get("/export/mountain.csv").status_code, 429)
+
+        first.close()
+        self.assertEqual(self.client.get("/export/mountain.csv").status_code, 200)
+
+
+class TestParallelExport(unittest.TestCase):
+
+    def test_tasks_per_profile_and_partition(self):
+        tasks = export_tasks(
+            ["water", "mountain"], "jsonl", "out",
+            partition_values={"mountain": ("breed", ["German Shepherd", "Rottweiler"])},
+        )
+
+        paths = [path for query, export_format, path in tasks]
+        self.assertEqual(paths, [
+            os.path.join("out", "water.jsonl"),
+            os.path.join("out", "mountain-German_Shepherd.jsonl"),
+            os.path.join("out", "mountain-Rottweiler.jsonl"),
+        ])
+        self.assertEqual(tasks[2][0]["$and"][1], {"breed": "Rottweiler"})
+
+    def test_partition_paths_unique(self):
+        tasks = export_tasks(
+            ["water"], "csv", "out",
+            partition_values={"water": ("breed", ["Lab Mix", "Lab/Mix", "lab mix", None])},
+        )
+
+        paths = [path for query, export_format, path in tasks]
+        self.assertEqual(paths, [
+            os.path.join("out", "water-Lab_Mix.csv"),
+            os.path.join("out", "water-Lab_Mix-2.csv"),
+            os.path.join("out", "water-lab_mix-3.csv"),
+            os.path.join("out", "water-missing.csv"),
+        ])
+        self.assertEqual(tasks[3][0]["$and"][1], {"breed": None})
+
+    @patch("Export_Module.ProcessPoolExecutor")
+    @patch("Export_Module.CRUD")
+    def test_partition_includes_missing_values(self, mock_crud_class, mock_pool_class):
+        collection = mock_crud_class.return_value.collection
+        collection.distinct.return_value = ["Rottweiler", None, "German Shepherd"]
+        collection.count_documents.return_value = 1
+        pool = mock_pool_class.return_value.__enter__.return_value
+        pool.map.return_value = iter([])
+
+        with tempfile.TemporaryDirectory() as directory:
+            Export_Module.export_profiles({"username": "user", "password": "pass"}, ["mountain"],
+                                          "csv", directory, partition_by="breed")
+
+        tasks = pool.map.call_args.args[1]
+        self.assertEqual([task[0]["$and"][1]["breed"] for task in tasks], ["German Shepherd", "Rottweiler", None])
+        query = collection.count_documents.call_args.args[0]
+        self.assertEqual(query["$and"][1], {"breed": None})
+
+    @patch("Export_Module.CRUD")
+    def test_export_file_counts_rows(self, mock_crud_class):
+        mock_crud_class.return_value.stream.return_value = make_documents(4)
+        Export_Module._init_worker({"username": "user", "password": "pass"})
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "water.csv")
+            result = Export_Module._export_file(({}, "csv", path))
+
+            self.assertEqual(result, (path, 4))
+            with open(path, newline='') as exported:
+                self.assertEqual(len(list(csv.DictReader(exported))), 4)
+
+    @patch("Export_Module.os.cpu_count", return_value=8)
+    @patch("Export_Module.ProcessPoolExecutor")
+    def test_export_profiles_uses_pool(self, mock_pool_class, mock_cpu_count):
+        pool = mock_pool_class.return_value.__enter__.return_value
+        pool.map.return_value = iter([("water.csv", 1), ("disaster.csv", 2)])
+        connection = {"username": "user", "password": "pass"}
+
+        with tempfile.TemporaryDirectory() as directory:
+            result = Export_Module.export_profiles(connection, ["water", "disaster"], "csv", directory)
+
+        self.assertEqual(result, [("water.csv", 1), ("disaster.csv", 2)])
+        kwargs = mock_pool_class.call_args.kwargs
+        self.assertEqual(kwargs["max_workers"], 2)
+        self.assertEqual(kwargs["initargs"], (connection,))
+        self.assertEqual(len(pool.map.call_args.args[1]), 2)
+
+    def test_unknown_profile(self):
+        with self.assertRaises(ValueError):
+            Export_Module.export_profiles({}, ["desert"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,129 @@
+"""
+Test script for Record_Store_Module.py
+
+Maintainer: Kyle Gortych
+Date: 02/22/2026
+"""
+
+import sys
+import unittest
+
+import numpy as np
+from bson.objectid import ObjectId
+
+from Record_Store_Module import AnimalRecord, RecordStore
+
+
+class TestRecordStore(unittest.TestCase):
+
+    def setUp(self):
+        breeds = ["Labrador Retriever Mix", "German Shepherd", "Bloodhound"]
+        self.documents = [
+            {
+                "_id": ObjectId(),
+                "rec_num": row,
+                "animal_id": f"A{row:06d}",
+                "animal_type": "Dog",
+                "breed": breeds[row % 3],
+                "datetime": "2026-01-15 10:00:00",
+                "monthyear": "2026-01-15T10:00:00",
+                "date_of_birth": "2024-01-01",
+                "name": None if row % 4 == 0 else "Buddy",
+                "location_lat": 30.75,
+                "location_long": -97.48,
+                "age_upon_outcome_in_weeks": 52.142857,
+            }
+            for row in range(300)
+        ]
+        self.store = RecordStore.from_documents(self.documents)
+
+    def test_column_kinds(self):
+        kinds = self.store.kinds
+        self.assertEqual(kinds["breed"], "string")
+        self.assertEqual(kinds["rec_num"], "int64")
+        self.assertEqual(kinds["datetime"], "time")
+        self.assertEqual(kinds["location_lat"], "float32")
+        self.assertEqual(self.store.arrays["breed"].dtype, np.int32)
+        self.assertEqual(len(self.store.arrays["breed.offsets"]), 4)
+
+    def test_record_round_trip(self):
+        record = self.store[1]
+        original = self.documents[1]
+
+        self.assertIsInstance(record, AnimalRecord)
+        self.assertEqual(record["_id"], str(original["_id"]))
+        self.assertEqual(record["breed"], original["breed"])
+        self.assertEqual(record["rec_num"], 1)
+        self.assertEqual(record["datetime"], "2026-01-15 10:00:00")
+        self.assertEqual(record["monthyear"], "2026-01-15T10:00:00")
+        self.assertEqual(record["date_of_birth"], "2024-01-01")
+        self.assertEqual(record["location_long"], -97.48)
+        self.assertAlmostEqual(record["age_upon_outcome_in_weeks"], 52.142857, places=4)
+        self.assertEqual(list(record.keys()), list(original.keys()))
+
+    def test_missing_values(self):
+        self.assertIsNone(self.store[0]["name"])
+        self.assertEqual(self.store[0].get("name", "unknown"), "unknown")
+        self.assertIsNone(self.store[0].get("color"))
+        with self.assertRaises(KeyError):
+            self.store[0]["color"]
+
+    def test_records_have_no_dict(self):
+        self.assertFalse(hasattr(self.store[0], "__dict__"))
+
+    def test_smaller_than_documents(self):
+        # Documents decoded from BSON hold their own copy of every value
+        document_bytes = sum(
+            sys.getsizeof(document) + sum(sys.getsizeof(value) for value in document.values())
+            for document in self.documents
+        )
+        self.assertLess(self.store.nbytes * 5, document_bytes)
+
+    def test_mask_agrees_with_matches_query(self):
+        from Change_Watcher_Module import matches_query
+        from Rescue_Query_Module import build_rescue_query
+
+        queries = [build_rescue_query(profile) for profile in ("water", "mountain", "disaster", "reset")] + [
+            {"name": None},
+            {"name": {"$ne": None}},
+            {"animal_type": "Cat"},
+            {"breed": {"$nin": ["Bloodhound"]}},
+            {"rec_num": {"$gte": 100, "$lt": 150}},
+            {"rec_num": {"$in": [1, 2, 400]}},
+        ]
+        for query in queries:
+            expected = [matches_query(record, query) for record in self.store]
+            self.assertEqual(self.store.mask(query).tolist(), expected, query)
+
+    def test_mask_unsupported_filters(self):
+        self.assertIsNone(self.store.mask({"datetime": {"$gte": "2026-01-01"}}))
+        self.assertIsNone(self.store.mask({"rec_num": {"$regex": "1"}}))
+
+    def test_mask_missing_column_is_none(self):
+        self.assertFalse(self.store.mask({"color": "Black"}).any())
+        self.assertTrue(self.store.mask({"color": None}).all())
+        self.assertFalse(self.store.mask({"color": {"$gte": 1}}).any())
+        self.assertIsNone(self.store.mask({"breed": {"$gt": "B"}}))
+
+    def test_unparseable_times_stay_strings(self):
+        store = RecordStore.from_documents([{"datetime": "yesterday"}])
+        self.assertEqual(store.kinds["datetime"], "string")
+        self.assertEqual(store[0]["datetime"], "yesterday")
+
+    def test_shared_memory_round_trip(self):
+        expected = self.store[7].to_dict()
+        self.store.share()
+        try:
+            self.assertEqual(self.store[7].to_dict(), expected)
+            self.assertFalse(self.store.arrays["breed"].flags.writeable)
+
+            attached = RecordStore.attach(self.store.segment.name)
+            self.assertEqual(len(attached), 300)
+            self.assertEqual(attached[7].to_dict(), expected)
+            attached.close()
+        finally:
+            self.store.unlink()
+
+
+if __name__ == "__main__":
+    unittest.main()
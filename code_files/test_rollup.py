@@ -0,0 +1,174 @@
+"""
+Test script for Rollup_Module.py
+
+Maintainer: Kyle Gortych
+Date: 02/22/2026
+"""
+
+import unittest
+from datetime import datetime
+from unittest.mock import MagicMock
+
+from pymongo.errors import AutoReconnect
+
+from CRUD_Python_Module import CRUDError
+from Rollup_Module import ROLLUPS, RollupStore, rollup_key
+
+
+class TestRollupKey(unittest.TestCase):
+
+    def test_key_from_document(self):
+        key = rollup_key({
+            "datetime": "2026-01-15 10:00:00",
+            "animal_type": "Dog",
+            "breed": "Newfoundland",
+            "sex_upon_outcome": "Intact Female",
+            "outcome_type": "Adoption",
+            "age_upon_outcome_in_weeks": 30.5,
+        })
+        self.assertEqual(key, {
+            "month": "2026-01",
+            "animal_type": "Dog",
+            "breed": "Newfoundland",
+            "sex": "Intact Female",
+            "outcome": "Adoption",
+            "age_bucket": 26,
+        })
+
+    def test_datetime_value_and_missing_fields(self):
+        key = rollup_key({"datetime": datetime(2026, 2, 1)})
+        self.assertEqual(key["month"], "2026-02")
+        self.assertIsNone(key["breed"])
+        self.assertIsNone(key["age_bucket"])
+
+    def test_non_numeric_age_has_no_bucket(self):
+        self.assertIsNone(rollup_key({"age_upon_outcome_in_weeks": "2 years"})["age_bucket"])
+
+
+class TestRollupStore(unittest.TestCase):
+
+    def setUp(self):
+        self.crud = MagicMock()
+        self.crud.collection_name = "animals"
+        self.collections = {}
+        self.crud.database.__getitem__.side_effect = (
+            lambda name: self.collections.setdefault(name, MagicMock())
+        )
+        self.store = RollupStore(self.crud)
+
+        self.document = {
+            "datetime": "2026-01-15 10:00:00",
+            "breed": "Newfoundland",
+            "outcome_type": "Transfer",
+            "age_upon_outcome_in_weeks": 52.0,
+        }
+
+    def summary(self, rollup):
+        return self.store.collection(rollup)
+
+    def test_collection_names(self):
+        self.assertEqual(self.store.collection_name("age_histogram"), "animals_rollup_age_histogram")
+
+    def test_insert_increments_every_rollup(self):
+        self.store.documents_changed([], [self.document, dict(self.document)])
+
+        for rollup, dimensions in ROLLUPS.items():
+            requests = self.summary(rollup).bulk_write.call_args.args[0]
+            self.assertEqual(len(requests), 1)
+            self.assertEqual(requests[0]._doc, {"$inc": {"count": 2}})
+            self.assertEqual(list(requests[0]._filter["_id"]), list(dimensions))
+
+        key = self.summary("breed_by_outcome").bulk_write.call_args.args[0][0]._filter["_id"]
+        self.assertEqual(key, {"sex": None, "breed": "Newfoundland", "outcome": "Transfer"})
+
+    def test_update_moves_count_between_keys(self):
+        adopted = dict(self.document, outcome_type="Adoption")
+        self.store.documents_changed([self.document], [adopted])
+
+        requests = self.summary("breed_by_outcome").bulk_write.call_args.args[0]
+        self.assertEqual(sorted(request._doc["$inc"]["count"] for request in requests), [-1, 1])
+        self.summary("breed_by_outcome").delete_many.assert_called_once_with({"count": {"$lte": 0}})
+
+        # The age histogram is not keyed by outcome
+        self.summary("age_histogram").bulk_write.assert_not_called()
+
+    def test_unchanged_key_skips_write(self):
+        self.store.documents_changed([self.document], [dict(self.document, name="Bear")])
+        for rollup in ROLLUPS:
+            self.summary(rollup).bulk_write.assert_not_called()
+
+    def test_observes_dimension_fields_only(self):
+        self.assertIn("breed", self.store.observed_fields)
+        self.assertNotIn("name", self.store.observed_fields)
+
+    def test_write_error_raises_crud_error(self):
+        self.summary("outcomes_per_month").bulk_write.side_effect = AutoReconnect("down")
+        with self.assertRaises(CRUDError):
+            self.store.documents_changed([], [self.document])
+        self.assertTrue(self.store.needs_rebuild)
+
+        self.store.rebuild()
+        self.assertFalse(self.store.needs_rebuild)
+
+    def test_counts_groups_summary_documents(self):
+        self.summary("breed_by_outcome").aggregate.return_value = [
+            {"_id": {"breed": "Newfoundland", "outcome": "Transfer"}, "count": 4},
+            {"_id": {"breed": "Bloodhound", "outcome": "Adoption"}, "count": 2},
+        ]
+
+        result = self.store.breed_by_outcome({"sex": ["Intact Male", "Intact Female"]})
+
+        self.assertEqual(result[("Newfoundland", "Transfer")], 4)
+        pipeline = self.summary("breed_by_outcome").aggregate.call_args.args[0]
+        self.assertEqual(pipeline[0]["$match"], {"_id.sex": {"$in": ["Intact Male", "Intact Female"]}})
+
+    def test_counts_uses_smallest_covering_rollup(self):
+        self.store.counts("outcome", {"animal_type": "Dog"})
+        self.summary("outcomes_per_month").aggregate.assert_called_once()
+        self.summary("breed_by_outcome").aggregate.assert_not_called()
+
+    def test_unknown_dimension(self):
+        with self.assertRaises(ValueError):
+            self.store.counts("color")
+
+    def test_uncovered_dimensions(self):
+        with self.assertRaises(ValueError):
+            self.store.counts(["month", "breed"])
+
+    def test_age_histogram_for_rescue_profile(self):
+        self.summary("age_histogram").aggregate.return_value = [
+            {"_id": {"age_bucket": 13}, "count": 1},
+            {"_id": {"age_bucket": 26}, "count": 3},
+            {"_id": {"age_bucket": 156}, "count": 2},
+            {"_id": {"age_bucket": 169}, "count": 5},
+            {"_id": {"age_bucket": None}, "count": 9},
+        ]
+        query = {
+            "animal_type": "Dog",
+            "breed": {"$in": ["Newfoundland"]},
+            "sex_upon_outcome": "Intact Female",
+            "age_upon_outcome_in_weeks": {"$gte": 26, "$lte": 156},
+        }
+
+        histogram = self.store.age_histogram(query)
+
+        self.assertEqual(histogram, {26: 3, 156: 2})
+        match = self.summary("age_histogram").aggregate.call_args.args[0][0]["$match"]
+        self.assertEqual(match["_id.breed"], {"$in": ["Newfoundland"]})
+        self.assertEqual(match["_id.sex"], "Intact Female")
+
+    def test_rebuild_outputs_to_summary_collections(self):
+        self.store.rebuild()
+
+        outputs = [call.args[0][-1] for call in self.crud.collection.aggregate.call_args_list]
+        self.assertEqual(outputs, [{"$out": f"animals_rollup_{rollup}"} for rollup in ROLLUPS])
+
+        group_id = self.crud.collection.aggregate.call_args.args[0][0]["$group"]["_id"]
+        self.assertEqual(list(group_id), list(ROLLUPS["age_histogram"]))
+        self.summary("age_histogram").create_index.assert_called_once_with([
+            ("_id.animal_type", 1), ("_id.sex", 1), ("_id.breed", 1), ("_id.age_bucket", 1)
+        ])
+
+
+if __name__ == "__main__":
+    unittest.main()
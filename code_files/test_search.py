@@ -0,0 +1,124 @@
+"""
+Test script for Search_Module.py
+
+Maintainer: Kyle Gortych
+Date: 02/22/2026
+"""
+
+import unittest
+
+from Record_Store_Module import AnimalRecord, RecordStore
+from Search_Module import SearchIndex, tokenize
+
+DOCUMENTS = [
+    {"_id": 1, "name": "Buddy", "breed": "Labrador Retriever Mix", "color": "Yellow"},
+    {"_id": 2, "name": "Luna", "breed": "German Shepherd", "color": "Black/Tan"},
+    {"_id": 3, "name": "Bear", "breed": "Newfoundland", "color": "Black"},
+    {"_id": 4, "name": None, "breed": "Labrador Retriever", "color": "Black"},
+]
+
+
+class TestSearchIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.index = SearchIndex()
+        self.index.build([dict(document) for document in DOCUMENTS])
+
+    def ids(self, results):
+        return [document["_id"] for score, document in results]
+
+    def test_tokenize(self):
+        self.assertEqual(tokenize("Black/Tan Mix"), ["black", "tan", "mix"])
+
+    def test_exact_match(self):
+        self.assertEqual(self.ids(self.index.search("luna")), [2])
+
+    def test_prefix_match(self):
+        self.assertEqual(self.ids(self.index.search("newf")), [3])
+
+    def test_typo_tolerant_match(self):
+        self.assertIn(1, self.ids(self.index.search("labrdor")))
+        self.assertEqual(self.ids(self.index.search("sheperd")), [2])
+
+    def test_all_tokens_required_and_ranked(self):
+        results = self.index.search("black labrador")
+        self.assertEqual(self.ids(results), [4])
+
+        ranked = self.ids(self.index.search("black"))
+        self.assertEqual(sorted(ranked), [2, 3, 4])
+
+    def test_exact_ranks_above_prefix(self):
+        self.index.documents_changed([], [{"_id": 5, "name": "Bea", "breed": "Beagle"}])
+        results = self.index.search("bea")
+        self.assertEqual(results[0][1]["_id"], 5)
+
+    def test_limit_and_predicate(self):
+        self.assertEqual(len(self.index.search("black", limit=1)), 1)
+        results = self.index.search("black", predicate=lambda document: document["name"] == "Bear")
+        self.assertEqual(self.ids(results), [3])
+
+    def test_no_match(self):
+        self.assertEqual(self.index.search("zebra"), [])
+        self.assertEqual(self.index.search("  "), [])
+
+    def test_matches_single_document(self):
+        document = {"_id": 9, "name": "Rex", "breed": "Labrador Retriever", "color": "Chocolate"}
+        self.assertTrue(self.index.matches("labrdor choc", document))
+        self.assertFalse(self.index.matches("labrador black", document))
+
+    def test_documents_changed_updates_index(self):
+        self.index.documents_changed([{"_id": 2}], [{"_id": 2, "name": "Nova", "breed": "German Shepherd"}])
+        self.assertEqual(self.index.search("luna"), [])
+        self.assertEqual(self.ids(self.index.search("nova")), [2])
+
+        self.index.documents_changed([{"_id": 3}], [])
+        self.assertEqual(self.index.search("newfoundland"), [])
+        self.assertEqual(len(self.index), 3)
+
+
+class TestSearchIndexStore(TestSearchIndex):
+    """The same searches over an index of record store rows."""
+
+    def setUp(self):
+        self.store = RecordStore.from_documents(DOCUMENTS)
+        self.index = SearchIndex()
+        self.index.build(self.store)
+
+    def test_rows_held_in_arrays(self):
+        self.assertEqual(self.index.documents, {})
+        self.assertEqual(len(self.index), 4)
+        self.assertIsInstance(self.index.search("luna")[0][1], AnimalRecord)
+
+        store_index = self.index._store_index
+        rows = store_index.rows[store_index.offsets[0]:store_index.offsets[1]]
+        self.assertEqual(rows.dtype.name, "int32")
+
+    def test_changed_row_moves_to_overlay(self):
+        self.index.documents_changed([{"_id": 2}], [{"_id": 2, "name": "Nova", "breed": "German Shepherd"}])
+        self.assertTrue(self.index._overlay.hidden[1])
+        self.assertEqual(list(self.index.documents), ["2"])
+        self.assertEqual(self.ids(self.index.search("shepherd")), [2])
+
+    def test_rows_mask_filters_before_scoring(self):
+        rows = self.store.mask({"breed": {"$in": ["Newfoundland", "German Shepherd"]}})
+        self.assertEqual(sorted(self.ids(self.index.search("black", rows=rows))), [2, 3])
+
+    def test_predicate_runs_until_limit(self):
+        calls = []
+
+        def predicate(document):
+            calls.append(document["_id"])
+            return True
+
+        self.assertEqual(len(self.index.search("black", limit=1, predicate=predicate)), 1)
+        self.assertEqual(len(calls), 1)
+
+    def test_changes_do_not_alter_running_search(self):
+        overlay = self.index._overlay
+        self.index.documents_changed([{"_id": 3}], [{"_id": 3, "name": "Bear", "breed": "Poodle"}])
+        self.assertFalse(overlay.hidden[2])
+        self.assertEqual(overlay.documents, {})
+
+
+if __name__ == "__main__":
+    unittest.main()